@@ -0,0 +1,46 @@
+"""JSON helpers backed by orjson, with a stdlib fallback.
+
+``loads`` accepts str, bytes or a memoryview (e.g. over an mmap). ``dumps`` returns
+bytes (orjson's native output); ``dumps_str`` returns text for SQLite TEXT columns and
+prompts. Non-str dict keys are coerced to strings in both implementations, matching
+stdlib json's behaviour.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+if orjson is not None:
+    _OPTS = orjson.OPT_NON_STR_KEYS
+    _INDENT_OPTS = _OPTS | orjson.OPT_INDENT_2
+
+    loads = orjson.loads
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=_OPTS)
+
+    def dumps_str(obj: Any, *, indent: bool = False) -> str:
+        return orjson.dumps(obj, option=_INDENT_OPTS if indent else _OPTS).decode()
+
+else:  # pragma: no cover
+
+    def loads(data: Any) -> Any:
+        # Accept the same inputs as orjson.loads, including memoryview
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def dumps_str(obj: Any, *, indent: bool = False) -> str:
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+__all__ = ["loads", "dumps", "dumps_str"]
@@ -1,39 +1,76 @@
 from __future__ import annotations
 
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any
 
-from app.inbox import notify, latest_settings_payload
+from app.inbox import notify, notify_deferred, latest_settings_payload
 from app.ai.tools import invoke_tool
-from app.store import insert_agent_run, finish_agent_run, log_tool_call, insert_decision
-import json as _json
-from app.ai.config import get_ai_settings
-from app.ai.policy import can_execute_waiver
-from app.config import get_settings
-from app.yahoo_client import YahooClient
+from app.store import AgentRunLog, agent_run_transaction, insert_decision
+import msgpack
 
+if TYPE_CHECKING:
+    from app.yahoo_client import YahooClient
 
-def run_agent(task: str, constraints: Dict[str, Any] | None = None) -> int:
+
+_EMPTY_ARGS = msgpack.packb({})
+_NO_WAIVERS_ACTION = "No waivers recommended."
+_STANDING_ACTIONS = (
+    "Lineup: check injuries and BYE exposures.",
+    "Trades: scan for both-sides gain opportunities.",
+)
+
+
+# (client id, client secret, redirect URI) the cached client was built with, and the client
+_YAHOO_CLIENT: tuple[tuple, YahooClient] | None = None
+
+
+def _yahoo_client() -> YahooClient:
+    # Reused so back-to-back autopilot claims share the HTTP connection; rebuilt whenever
+    # the Yahoo credentials in the current settings change
+    global _YAHOO_CLIENT
+    from app.config import get_settings
+
+    s = get_settings()
+    key = (s.yahoo_client_id, s.yahoo_client_secret, s.yahoo_redirect_uri)
+    if _YAHOO_CLIENT is None or _YAHOO_CLIENT[0] != key:
+        from app.yahoo_client import YahooClient
+
+        _YAHOO_CLIENT = (key, YahooClient())
+    return _YAHOO_CLIENT[1]
+
+
+def _pack(obj: Any) -> bytes:
+    # Tool-call and decision payloads are debug records stored as msgpack BLOBs; read them
+    # back with app.store.decode_log_payload
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def run_agent(task: str, constraints: Dict[str, Any] | None = None) -> int | None:
     """Lightweight agent orchestrator.
 
     - Requires LeagueSettings loaded (banner payload present)
     - Collects league state and (optionally) ranks waivers
     - Posts a single GM Brief-like message to the Inbox
 
-    Returns the Inbox message id.
+    Returns the Inbox message id, or None with ``async_inbox``: the message is written
+    later, and the run's summary decision (with the id) is recorded when it is.
     """
     constraints = constraints or {}
     payload = latest_settings_payload() or {}
     if not payload:
         raise RuntimeError("LeagueSettings not loaded; load settings before running the agent")
 
-    run_id = insert_agent_run(task)
+    # Tool calls and the summary decision are buffered and written in one transaction
+    with agent_run_transaction(task) as run:
+        return _run(run, task, constraints, payload)
+
+
+def _run(run: AgentRunLog, task: str, constraints: Dict[str, Any], payload: Dict[str, Any]) -> int | None:
     # 1) State
     try:
         state = invoke_tool("get_league_state", {})
-        log_tool_call(run_id, "get_league_state", args=_json.dumps({}), result=_json.dumps(state))
+        run.log_tool_call("get_league_state", args=_EMPTY_ARGS, result=_pack(state))
     except Exception as err:
-        log_tool_call(run_id, "get_league_state", args=_json.dumps({}), error=str(err))
-        finish_agent_run(run_id, status="error")
+        run.log_tool_call("get_league_state", args=_EMPTY_ARGS, error=str(err))
         raise
 
     # 2) Optionally waivers (skip if offline/testing flag)
@@ -41,9 +78,9 @@ def run_agent(task: str, constraints: Dict[str, Any] | None = None) -> int:
     if not constraints.get("offline"):
         try:
             waivers = invoke_tool("rank_waivers", {})
-            log_tool_call(run_id, "rank_waivers", args=_json.dumps({}), result=_json.dumps(waivers))
+            run.log_tool_call("rank_waivers", args=_EMPTY_ARGS, result=_pack(waivers))
         except Exception as err:
-            log_tool_call(run_id, "rank_waivers", args=_json.dumps({}), error=str(err))
+            run.log_tool_call("rank_waivers", args=_EMPTY_ARGS, error=str(err))
             waivers = {"error": str(err), "recommendations": []}
 
     # 3) Compose a concise brief
@@ -51,77 +88,89 @@ def run_agent(task: str, constraints: Dict[str, Any] | None = None) -> int:
     pending_actions = []
     if waivers.get("recommendations"):
         top = waivers["recommendations"][0]
-        actions.append(
-            f"Waiver: add {top.get('name')} ({top.get('position')}) — score {top.get('score')} FAAB {top.get('faab_min')}-{top.get('faab_max')}"
+        name, pos, top_score, fmin, fmax = (
+            top.get("name"),
+            top.get("position"),
+            top.get("score"),
+            top.get("faab_min"),
+            top.get("faab_max"),
         )
+        actions.append(f"Waiver: add {name} ({pos}) — score {top_score} FAAB {fmin}-{fmax}")
         # Add as a pending action unless executed by autopilot
         pending_actions.append(
             {
                 "type": "waiver",
                 "add_player_id": top.get("player_id"),
                 "drop_player_id": None,
-                "bid_amount": top.get("faab_min"),
-                "score": top.get("score"),
+                "bid_amount": fmin,
+                "score": top_score,
             }
         )
     else:
-        actions.append("No waivers recommended.")
+        actions.append(_NO_WAIVERS_ACTION)
 
-    actions.append("Lineup: check injuries and BYE exposures.")
-    actions.append("Trades: scan for both-sides gain opportunities.")
+    actions.extend(_STANDING_ACTIONS)
 
     # Optional autopilot execution (waivers only)
     if pending_actions and not constraints.get("offline"):
         try:
+            # Imported here: only the autopilot path needs settings and policy
+            from app.ai.config import get_ai_settings
+            from app.ai.policy import can_execute_waiver
+            from app.config import get_settings
+
             ai_settings = get_ai_settings()
             if not ai_settings.ai_autopilot:
                 raise RuntimeError("autopilot disabled")
             act = pending_actions[0]
             score = float(act.get("score") or 0)
             bid = float(act.get("bid_amount") or 0)
+            bid_int = int(bid)
+            add_pid = act.get("add_player_id")
             # Use FAAB budget as cap proxy; remaining would be better when available
             s = get_settings()
-            faab_total = s.league_key and (latest_settings_payload() or {}).get("faab_budget")
+            faab_total = s.league_key and payload.get("faab_budget")
             if can_execute_waiver(score, confidence=None, faab_bid=bid, faab_total=faab_total):
                 league_key = s.league_key
                 team_key = s.team_key
                 if not league_key or not team_key:
                     raise RuntimeError("LEAGUE_KEY and TEAM_KEY must be set for autopilot writes")
-                xml = f"""
-<fantasy_content>
-  <transaction>
-    <type>add</type>
-    <faab_bid>{int(bid)}</faab_bid>
-    <player>
-      <player_key>{act.get('add_player_id')}</player_key>
-    </player>
-    <team_key>{team_key}</team_key>
-  </transaction>
-</fantasy_content>""".strip()
-                client = YahooClient()
+                from app.yahoo_client import add_transaction_xml
+
+                xml = add_transaction_xml(add_pid, team_key, bid_int)
+                client = _yahoo_client()
                 resp = client.post_xml(f"league/{league_key}/transactions", xml)
-                actions.append(f"Autopilot: submitted waiver for {act.get('add_player_id')} (bid {int(bid)})")
+                actions.append(f"Autopilot: submitted waiver for {add_pid} (bid {bid_int})")
                 # Clear pending since executed
                 pending_actions = []
         except Exception as err:
             actions.append(f"Autopilot skipped: {err}")
 
-    lines = ["AI GM Brief", "", "Actions:"] + [f"- {a}" for a in actions]
+    lines = ["AI GM Brief", "", "Actions:", *(f"- {a}" for a in actions)]
     body = "\n".join(lines)
 
-    msg_id = notify(
-        "brief",
-        "AI GM Brief",
-        body,
-        {
-            "task": task,
-            "state": state,
-            "waivers": waivers,
-            "pending_actions": pending_actions,
-        },
-    )
-    insert_decision(run_id, kind="summary", confidence=None, payload=_json.dumps({"message_id": msg_id, "actions": actions}))
-    finish_agent_run(run_id, status="ok")
+    # State and waivers live in this run's tool_calls and get_inbox_detail() rebuilds them,
+    # so they must be written before the brief shows up in the Inbox
+    run.flush_tool_calls()
+    brief_payload = {
+        "task": task,
+        "state_ref": run.run_id,
+        "waivers_count": len(waivers.get("recommendations") or []),
+        "pending_actions": pending_actions,
+    }
+    if constraints.get("async_inbox"):
+        # The Inbox write lands in the next batch flush; the summary decision is recorded
+        # once it does, so it still carries the message id
+        run_id = run.run_id
+        notify_deferred("brief", "AI GM Brief", body, brief_payload).add_done_callback(
+            lambda posted: insert_decision(
+                run_id, kind="summary", confidence=None,
+                payload=_pack({"message_id": posted.result(), "actions": actions}),
+            )
+        )
+        return None
+    msg_id = notify("brief", "AI GM Brief", body, brief_payload)
+    run.insert_decision(kind="summary", confidence=None, payload=_pack({"message_id": msg_id, "actions": actions}))
     return msg_id
 
 
@@ -1,18 +1,40 @@
 import time
+from functools import lru_cache
 from typing import Any
 
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+from openai import APIConnectionError, OpenAI, RateLimitError
 
-from .config import get_ai_settings
+from .config import get_openai_api_key
+
+
+@lru_cache(maxsize=1)
+def _openai_client(api_key: str) -> OpenAI:
+    return OpenAI(api_key=api_key)
 
 
 def _client() -> OpenAI:
-    s = get_ai_settings()
-    return OpenAI(api_key=s.openai_api_key)
+    # One OpenAI client per key keeps its HTTP connection pool warm across calls and retries;
+    # keying on the key means a rotated key (env change or reset_ai_settings()) is picked up.
+    return _openai_client(get_openai_api_key())
+
+
+# Only transient API failures are retried; config/programming errors surface immediately.
+# APITimeoutError is a subclass of APIConnectionError.
+_RETRYABLE = (RateLimitError, APIConnectionError)
+_ATTEMPTS = 3
+
+
+def _usage(u: Any) -> dict[str, int]:
+    # Read the three counters directly rather than paying for a full pydantic model_dump()
+    if not u:
+        return {}
+    return {
+        "prompt_tokens": u.prompt_tokens,
+        "completion_tokens": u.completion_tokens,
+        "total_tokens": u.total_tokens,
+    }
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, min=0.5, max=4))
 def ask(
     messages: list[dict[str, str]] | None = None,
     prompt: str | None = None,
@@ -37,13 +59,26 @@ def ask(
     if max_tokens:
         kwargs["max_tokens"] = max_tokens
     
-    resp = client.chat.completions.create(**kwargs)
+    for attempt in range(_ATTEMPTS):
+        try:
+            resp = client.chat.completions.create(**kwargs)
+            break
+        except _RETRYABLE:
+            if attempt == _ATTEMPTS - 1:
+                raise
+            time.sleep(min(4.0, 0.5 * 2**attempt))
     content = (resp.choices[0].message.content or "").strip()
     
     return {
         "content": content,
         "model": model,
-        "usage": resp.usage.model_dump() if resp.usage else {},
+        "usage": _usage(resp.usage),
     }
 
 
+def ask_text(prompt: str, **kwargs: Any) -> str:
+    """Convenience wrapper returning only the completion text."""
+    return ask(prompt=prompt, **kwargs)["content"]
+
+
+__all__ = ["ask", "ask_text"]
@@ -1,3 +1,6 @@
+import os
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, ValidationError
 
@@ -13,7 +16,16 @@ class AISettings(BaseSettings):
     ai_autopilot: bool = Field(False, alias="AI_AUTOPILOT")
 
 
+@lru_cache(maxsize=1)
 def get_ai_settings() -> AISettings:
     return AISettings()
 
 
+def reset_ai_settings() -> None:
+    """Drop the cached AISettings so the next call re-reads env/.env (tests, key rotation)."""
+    get_ai_settings.cache_clear()
+
+
+def get_openai_api_key() -> str:
+    """API key for the OpenAI client; reads the environment directly, falling back to AISettings (.env)."""
+    return os.environ.get("OPENAI_API_KEY") or get_ai_settings().openai_api_key
@@ -1,22 +1,34 @@
 from __future__ import annotations
 
-from typing import Dict, Any
+from typing import Any, Dict, Set
 
+from app.db import get_db_path
 from app.store import get_connection
 
 
-def build_context(top_n: int = 10) -> Dict[str, Any]:
+# DB paths already seen with a players table. Only positives are remembered: the table
+# never goes away once migrate() creates it, but may not exist yet on the first check.
+_HAS_PLAYERS: Set[str] = set()
+
+
+def _has_players_table(db_path: str) -> bool:
+    if db_path in _HAS_PLAYERS:
+        return True
     con = get_connection()
     try:
         cur = con.cursor()
-        # Very simple context for now; can be expanded
         cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='players'")
-        has_players = bool(cur.fetchone())
-        return {"has_players": has_players, "top_free_agents": []}
+        found = bool(cur.fetchone())
     finally:
         con.close()
+    if found:
+        _HAS_PLAYERS.add(db_path)
+    return found
 
 
-__all__ = ["build_context"]
+def build_context(top_n: int = 10) -> Dict[str, Any]:
+    # Very simple context for now; can be expanded
+    return {"has_players": _has_players_table(get_db_path()), "top_free_agents": []}
 
 
+__all__ = ["build_context"]
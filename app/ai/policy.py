@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, Optional
+import os
+from typing import Any, Dict, NamedTuple, Optional
 
 from .config import get_ai_settings
 
@@ -11,35 +12,68 @@ DEFAULT_THRESHOLDS = {
 }
 
 
-def get_thresholds() -> Dict[str, Any]:
-    # Read from env JSON if set via AI_THRESHOLDS_JSON; otherwise defaults
-    import os
+class WaiverThresholds(NamedTuple):
+    score_min: float
+    confidence_min: float
+    faab_cap_pct: float
 
+
+def _waiver_thresholds(t: Dict[str, Any]) -> WaiverThresholds:
+    try:
+        return WaiverThresholds(
+            float(t.get("score_min", 0)),
+            float(t.get("confidence_min", 0)),
+            float(t.get("faab_cap_pct", 1.0)),
+        )
+    except (TypeError, ValueError):
+        return _waiver_thresholds(DEFAULT_THRESHOLDS["waiver"])
+
+
+def _load_thresholds() -> Dict[str, Any]:
+    # Read from env JSON if set via AI_THRESHOLDS_JSON; otherwise defaults
     raw = os.getenv("AI_THRESHOLDS_JSON")
     if not raw:
         return DEFAULT_THRESHOLDS
     try:
         data = json.loads(raw)
-        if not isinstance(data, dict):
+        if not isinstance(data, dict) or not isinstance(data.get("waiver"), dict):
             return DEFAULT_THRESHOLDS
         return data
     except Exception:
         return DEFAULT_THRESHOLDS
 
 
+# Parsed once at import; call reload_thresholds() after changing AI_THRESHOLDS_JSON
+_THRESHOLDS = _load_thresholds()
+_WAIVER_T = _waiver_thresholds(_THRESHOLDS["waiver"])
+
+
+def get_thresholds() -> Dict[str, Any]:
+    return _THRESHOLDS
+
+
+def reload_thresholds() -> Dict[str, Any]:
+    """Re-read AI_THRESHOLDS_JSON (tests, config changes) and return the new thresholds."""
+    global _THRESHOLDS, _WAIVER_T
+    _THRESHOLDS = _load_thresholds()
+    _WAIVER_T = _waiver_thresholds(_THRESHOLDS["waiver"])
+    return _THRESHOLDS
+
+
 def can_execute_waiver(score: float, confidence: Optional[float], faab_bid: float, faab_total: Optional[float]) -> bool:
-    t = get_thresholds()["waiver"]
-    if score < float(t.get("score_min", 0)):
+    t = _WAIVER_T
+    if score < t.score_min:
         return False
-    if confidence is not None and confidence < float(t.get("confidence_min", 0)):
+    if confidence is not None and confidence < t.confidence_min:
         return False
-    if faab_total and faab_total > 0:
-        cap = float(t.get("faab_cap_pct", 1.0)) * float(faab_total)
-        if faab_bid > cap:
+    if faab_total:
+        # faab_budget comes straight from the stored settings payload and may be a string
+        total = float(faab_total)
+        if total > 0 and faab_bid > t.faab_cap_pct * total:
             return False
     return True
 
 
-__all__ = ["get_thresholds", "can_execute_waiver"]
+__all__ = ["WaiverThresholds", "get_thresholds", "reload_thresholds", "can_execute_waiver"]
 
 
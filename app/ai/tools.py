@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+from dataclasses import fields
 from typing import Any, Callable, Dict, Tuple
 
 from app.inbox import notify, latest_settings_payload
 from app.store import get_connection
-from app.waivers import rank_free_agents, free_agents_from_yahoo
+from app.waivers import WaiverRecommendation, rank_free_agents, free_agents_from_yahoo
 from app.models import LeagueSettings
 from app.yahoo_client import YahooClient
 from app.config import get_settings
@@ -12,19 +13,22 @@ from app.config import get_settings
 
 ToolFunc = Callable[[Dict[str, Any]], Dict[str, Any]]
 
+_REC_FIELDS = tuple(f.name for f in fields(WaiverRecommendation))
+
 
 def _get_league_state(_: Dict[str, Any]) -> Dict[str, Any]:
     # Compose basic state from DB and last-known settings; avoid network in this tool
     payload = latest_settings_payload() or {}
     con = get_connection()
     try:
-        cur = con.cursor()
-        cur.execute("SELECT COUNT(1) FROM teams")
-        teams = cur.fetchone()[0] if cur.fetchone is not None else 0
-        cur.execute("SELECT COUNT(1) FROM players")
-        players = cur.fetchone()[0] if cur.fetchone is not None else 0
-        cur.execute("SELECT COUNT(1) FROM recommendations WHERE status='pending'")
-        pending = cur.fetchone()[0] if cur.fetchone is not None else 0
+        teams, players, pending = con.execute(
+            """
+            SELECT
+              (SELECT COUNT(1) FROM teams),
+              (SELECT COUNT(1) FROM players),
+              (SELECT COUNT(1) FROM recommendations WHERE status='pending')
+            """
+        ).fetchone()
     finally:
         con.close()
     return {
@@ -58,7 +62,7 @@ def _rank_waivers(_: Dict[str, Any]) -> Dict[str, Any]:
         waiver_type="faab",
         top_n=5,
     )
-    out = [r.__dict__ for r in recs]
+    out = [{k: getattr(r, k) for k in _REC_FIELDS} for r in recs]
     return {"recommendations": out}
 
 
@@ -85,8 +89,7 @@ def _execute_waiver(args: Dict[str, Any]) -> Dict[str, Any]:
     return {"executed": False, "reason": "approvals_required"}
 
 
-def registry() -> Dict[str, Tuple[ToolFunc, Dict[str, Any]]]:
-    """Return tool name -> (callable, json_schema) mapping."""
+def _build_registry() -> Dict[str, Tuple[ToolFunc, Dict[str, Any]]]:
     return {
         "get_league_state": (
             _get_league_state,
@@ -158,11 +161,26 @@ def registry() -> Dict[str, Tuple[ToolFunc, Dict[str, Any]]]:
     }
 
 
+# Built once at import; the set of tools is static for the life of the process
+_REGISTRY = _build_registry()
+_SCHEMAS: Dict[str, Dict[str, Any]] = {n: schema for n, (_func, schema) in _REGISTRY.items()}
+
+
+def registry() -> Dict[str, Tuple[ToolFunc, Dict[str, Any]]]:
+    """Return tool name -> (callable, json_schema) mapping (shared; do not mutate)."""
+    return _REGISTRY
+
+
+def schemas() -> Dict[str, Dict[str, Any]]:
+    """Return tool name -> json_schema mapping for function-calling callers (shared; do not mutate)."""
+    return _SCHEMAS
+
+
 def invoke_tool(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
-    tools = registry()
-    if name not in tools:
+    entry = _REGISTRY.get(name)
+    if entry is None:
         raise KeyError(f"Unknown tool: {name}")
-    func, _schema = tools[name]
+    func, _schema = entry
     return func(args)
 
 
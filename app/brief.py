@@ -1,170 +1,163 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from typing import Dict, List, Tuple
-import json as _json
+from . import _json
 
 from .inbox import notify
 from .models import LeagueSettings
-from .store import get_connection
-from .ai.client import ask
-from .ai.config import get_ai_settings
+from .db import get_reader
 from .config import get_settings
-from .news import fetch_all_news, get_injury_news
-from .projections import get_projections, get_player_projection
+from .prefetch import context_key, wait_or_compute
+from .utils import ttl_cache
+
+
+# One round-trip for the brief context. Each arm is tagged with a group number (grp) and
+# its position within that group (pos) so the outer ORDER BY keeps every arm's own order.
+_LEAGUE_CONTEXT_SQL = """
+SELECT 0 AS grp, ROW_NUMBER() OVER (ORDER BY rowid) AS pos,
+       id, name, manager, NULL, NULL, NULL, NULL, NULL
+FROM teams
+UNION ALL
+SELECT * FROM (
+    SELECT 1, ROW_NUMBER() OVER (ORDER BY r.id),
+           r.player_id, p.name, p.position, p.team, p.bye_week, r.slot, r.status, NULL
+    FROM rosters r LEFT JOIN players p ON r.player_id = p.id
+    WHERE r.team_id = :team
+      AND r.week = (SELECT MAX(week) FROM rosters WHERE team_id = :team)
+)
+UNION ALL
+SELECT * FROM (
+    SELECT 2, ROW_NUMBER() OVER (ORDER BY id DESC), kind, team_id, raw = '' OR j IS NOT NULL,
+           json_extract(j, '$.type'), json_extract(j, '$.timestamp'),
+           json_extract(j, '$.status'), json_extract(j, '$.player_id'),
+           -- Yahoo keeps added/dropped players under a nested "players" object (JSON text here)
+           CASE WHEN json_type(j, '$.players') IN ('object', 'array') THEN json_extract(j, '$.players') END
+    FROM (
+        -- json_extract raises on malformed text, so only valid JSON reaches it
+        SELECT id, kind, team_id, raw, CASE WHEN json_valid(raw) THEN raw END AS j
+        FROM transactions_raw ORDER BY id DESC LIMIT 20
+    )
+)
+UNION ALL
+SELECT * FROM (
+    SELECT 3, ROW_NUMBER() OVER (ORDER BY week DESC), week, team_id, opponent_id, NULL, NULL, NULL, NULL, NULL
+    FROM matchups ORDER BY week DESC LIMIT 12
+)
+UNION ALL
+SELECT 4, ROW_NUMBER() OVER (ORDER BY p.name), p.name, p.team, NULL, NULL, NULL, NULL, NULL, NULL
+FROM rosters r JOIN players p ON r.player_id = p.id
+GROUP BY p.name, p.team
+ORDER BY grp, pos
+"""
+
+
+# Top-level transaction fields the brief reads, in _LEAGUE_CONTEXT_SQL's column order;
+# "players" arrives as JSON text and is decoded in _get_league_context
+_TX_FIELDS = ("type", "timestamp", "status", "player_id", "players")
 
 
 def _get_league_context(settings: LeagueSettings) -> Dict:
     """Fetch current league state from database."""
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-
-        # Get user's team
-        cfg = get_settings()
-        my_team_id = cfg.team_key.split(".")[-1] if cfg.team_key else None
-
-        # Teams
-        cur.execute("SELECT id, name, manager FROM teams")
-        teams = [{"id": row[0], "name": row[1], "manager": row[2]} for row in cur.fetchall()]
-
-        # My roster (current week with team and bye info)
-        my_roster = []
-        if my_team_id:
-            cur.execute(
-                "SELECT r.player_id, p.name, p.position, p.team, p.bye_week, r.slot, r.status FROM rosters r "
-                "LEFT JOIN players p ON r.player_id = p.id "
-                "WHERE r.team_id = ? ORDER BY r.week DESC LIMIT 20",
-                (my_team_id,)
-            )
-            my_roster = [
-                {
-                    "id": row[0],
-                    "name": row[1],
-                    "position": row[2],
-                    "nfl_team": row[3] or "FA",
-                    "bye_week": row[4],
-                    "slot": row[5],
-                    "status": row[6]
-                }
-                for row in cur.fetchall()
-            ]
-
-        # Recent transactions (last 20)
-        cur.execute(
-            "SELECT kind, team_id, raw FROM transactions_raw ORDER BY id DESC LIMIT 20"
-        )
-        transactions = []
-        for row in cur.fetchall():
-            try:
-                tx_data = _json.loads(row[2]) if row[2] else {}
-                transactions.append({"kind": row[0], "team_id": row[1], "data": tx_data})
-            except:
-                pass
-
-        # Matchups (current week)
-        cur.execute(
-            "SELECT week, team_id, opponent_id FROM matchups ORDER BY week DESC LIMIT 12"
-        )
-        matchups = [{"week": row[0], "team": row[1], "opponent": row[2]} for row in cur.fetchall()]
+    # Get user's team
+    cfg = get_settings()
+    my_team_id = cfg.team_key.split(".")[-1] if cfg.team_key else None
+
+    # teams, my roster (its latest stored week, with team and bye info; none without a team key),
+    # last 20 transactions, current-week matchups, all rostered players
+    groups: Dict[int, List[tuple]] = {0: [], 1: [], 2: [], 3: [], 4: []}
+    with get_reader() as conn:
+        for row in conn.execute(_LEAGUE_CONTEXT_SQL, {"team": my_team_id}):
+            groups[row[0]].append(tuple(row)[2:])
+
+    teams = [{"id": row[0], "name": row[1], "manager": row[2]} for row in groups[0]]
+    my_roster = [
+        {
+            "id": row[0],
+            "name": row[1],
+            "position": row[2],
+            "nfl_team": row[3] or "FA",
+            "bye_week": row[4],
+            "slot": row[5],
+            "status": row[6]
+        }
+        for row in groups[1]
+    ]
 
-        # Determine current week from most recent matchup
-        current_week = matchups[0]["week"] if matchups else 1
+    # Transaction fields are projected by SQLite (json1); rows whose raw JSON is malformed are skipped
+    transactions = []
+    for row in groups[2]:
+        if not row[2]:
+            continue
+        data = {k: v for k, v in zip(_TX_FIELDS, row[3:]) if v is not None}
+        if "players" in data:
+            data["players"] = _json.loads(data["players"])
+        transactions.append({"kind": row[0], "team_id": row[1], "data": data})
 
-        # Get all rostered players (to help AI avoid recommending rostered players)
-        cur.execute(
-            "SELECT DISTINCT p.name, p.team FROM rosters r "
-            "JOIN players p ON r.player_id = p.id "
-            "ORDER BY p.name"
-        )
-        all_rostered_players = [f"{row[0]} ({row[1]})" for row in cur.fetchall()]
-
-        return {
-            "teams": teams,
-            "my_team_id": my_team_id,
-            "my_roster": my_roster,
-            "transactions": transactions,
-            "matchups": matchups,
-            "current_week": current_week,
-            "all_rostered_players": all_rostered_players,
-            "settings": settings.model_dump(),
-        }
-    finally:
-        conn.close()
+    matchups = [{"week": row[0], "team": row[1], "opponent": row[2]} for row in groups[3]]
 
+    # Determine current week from most recent matchup
+    current_week = matchups[0]["week"] if matchups else 1
 
-def build_gm_brief(settings: LeagueSettings) -> Tuple[str, str, Dict]:
-    """Generate AI-powered GM brief using OpenAI."""
-    context = _get_league_context(settings)
+    # All rostered players (to help AI avoid recommending rostered players)
+    all_rostered_players = [f"{row[0]} ({row[1]})" for row in groups[4]]
 
-    try:
-        # Check if OpenAI is configured
-        ai_settings = get_ai_settings()
+    return {
+        "teams": teams,
+        "my_team_id": my_team_id,
+        "my_roster": my_roster,
+        "transactions": transactions,
+        "matchups": matchups,
+        "current_week": current_week,
+        "all_rostered_players": all_rostered_players,
+        "settings": settings.model_dump(),
+    }
 
-        # Get latest news for context
-        all_news = fetch_all_news(max_age_minutes=60, limit_per_source=15)
-        injury_news = get_injury_news(limit=10)
 
-        # Format news for AI
-        news_summary = []
-        for item in injury_news[:5]:
-            news_summary.append(f"- [{item.source}] {item.title}")
+# Keyed by settings.scoring.ppr (1 == 1.0, so int and float values both match)
+_SCORING_LABELS = {1.0: "PPR (1.0)", 0.5: "Half-PPR (0.5)"}
 
-        for item in all_news[:10]:
-            if item.category != "injury":  # Already got injuries above
-                news_summary.append(f"- [{item.source}] {item.title}")
 
-        # Build enhanced context with player details and projections
-        current_week = context.get('current_week', 1)
-        roster_detail = []
-        for p in context['my_roster']:
-            player_info = {
-                "name": p.get('name'),
-                "position": p.get('position'),
-                "nfl_team": p.get('nfl_team', 'FA'),
-                "bye_week": p.get('bye_week'),
-                "slot": p.get('slot'),
-                "status": p.get('status') or "Active"
-            }
+# (max_age_minutes, limit_per_source, injury_limit) used for the brief; shared with app.prefetch
+BRIEF_NEWS_ARGS = (60, 15, 10)
 
-            # Add projection if available
-            if p.get('name') and p.get('position'):
-                proj = get_player_projection(p['name'], current_week, p['position'])
-                if proj:
-                    scoring_type = "ppr" if settings.scoring.ppr == 1 else ("half_ppr" if settings.scoring.ppr == 0.5 else "standard")
-                    if scoring_type == "ppr":
-                        player_info["projected_pts"] = proj.fantasy_points_ppr
-                    elif scoring_type == "half_ppr":
-                        player_info["projected_pts"] = proj.fantasy_points_half_ppr
-                    else:
-                        player_info["projected_pts"] = proj.fantasy_points_standard
 
-            roster_detail.append(player_info)
+@ttl_cache(ttl=300, maxsize=4)
+def _brief_news(max_age_minutes: int, limit_per_source: int, injury_limit: int) -> Tuple[List, List]:
+    # Regenerating the brief within a few minutes reuses the same news instead of refetching.
+    # The two fetches stay sequential: get_injury_news() is served from the file cache the
+    # first call just filled, so running them in parallel would only duplicate HTTP requests.
+    from .news import fetch_all_news, get_injury_news
 
-        # Build prompt for OpenAI
-        prompt = f"""You are an expert fantasy football advisor for NFL Week {context.get('current_week', '?')}.
+    all_news = fetch_all_news(max_age_minutes=max_age_minutes, limit_per_source=limit_per_source)
+    return all_news, get_injury_news(limit=injury_limit)
+
+
+# Filled with format_map() in build_gm_brief; the structure is fixed, only the leaves vary
+_GM_BRIEF_PROMPT = """You are an expert fantasy football advisor for NFL Week {week}.
 Generate a concise, actionable GM brief for the user's fantasy team.
 
 LEAGUE SETTINGS:
-- Scoring: {"PPR (1.0)" if settings.scoring.ppr == 1 else ("Half-PPR (0.5)" if settings.scoring.ppr == 0.5 else "Standard (0.0)")}
-- Starting Roster: {settings.roster_slots}
-- FAAB Budget: ${settings.faab_budget or 100}
+- Scoring: {scoring}
+- Starting Roster: {roster_slots}
+- FAAB Budget: ${faab_budget}
 
-YOUR CURRENT ROSTER ({len(roster_detail)} players):
-{_json.dumps(roster_detail, indent=2)}
+YOUR CURRENT ROSTER ({roster_count} players):
+{roster_json}
 Note: projected_pts shown where available (may be None if projections not configured)
 
 LATEST NFL NEWS (use this for injury/status updates):
-{chr(10).join(news_summary)}
+{news_block}
 
 ALL ROSTERED PLAYERS IN LEAGUE (do NOT recommend these for waivers):
-{', '.join(context['all_rostered_players'][:100])}
-... and {len(context['all_rostered_players']) - 100} more
+{rostered_names}
+... and {rostered_more} more
 
 RECENT LEAGUE TRANSACTIONS:
-{_json.dumps(context['transactions'][:3], indent=2)}
+{tx_json}
 
 MATCHUP INFO:
-{_json.dumps(context['matchups'][:3], indent=2)}
+{matchup_json}
 
 IMPORTANT INSTRUCTIONS:
 - Use the NEWS section above to inform ALL recommendations (injuries, player status, team changes)
@@ -186,6 +179,69 @@ Generate a brief with these sections:
 
 Format as markdown. Be concise but specific."""
 
+
+def build_gm_brief(settings: LeagueSettings) -> Tuple[str, str, Dict]:
+    """Generate AI-powered GM brief using OpenAI."""
+    context = wait_or_compute(context_key(settings), lambda: _get_league_context(settings))
+
+    try:
+        # Imported here so Inbox-only callers don't load the OpenAI client and news/projection
+        # fetchers; an import failure falls back to the data brief like any other AI error
+        from .ai.client import ask
+        from .ai.config import get_ai_settings
+        from .projections import get_player_projection, points_attr_for
+
+        # Check if OpenAI is configured
+        ai_settings = get_ai_settings()
+
+        # Get latest news for context
+        all_news, injury_news = _brief_news(*BRIEF_NEWS_ARGS)
+
+        # Format news for AI
+        news_summary = [
+            *(f"- [{item.source}] {item.title}" for item in injury_news[:5]),
+            # Already got injuries above
+            *(f"- [{item.source}] {item.title}" for item in all_news[:10] if item.category != "injury"),
+        ]
+
+        # Build enhanced context with player details and projections
+        current_week = context.get('current_week', 1)
+        points_attr = points_attr_for(settings.scoring.ppr)
+        roster_detail = []
+        for p in context['my_roster']:
+            player_info = {
+                "name": p.get('name'),
+                "position": p.get('position'),
+                "nfl_team": p.get('nfl_team', 'FA'),
+                "bye_week": p.get('bye_week'),
+                "slot": p.get('slot'),
+                "status": p.get('status') or "Active"
+            }
+
+            # Add projection if available
+            if p.get('name') and p.get('position'):
+                proj = get_player_projection(p['name'], current_week, p['position'])
+                if proj:
+                    player_info["projected_pts"] = getattr(proj, points_attr)
+
+            roster_detail.append(player_info)
+
+        # Build prompt for OpenAI
+        rostered = context['all_rostered_players']
+        prompt = _GM_BRIEF_PROMPT.format_map({
+            "week": context.get('current_week', '?'),
+            "scoring": _SCORING_LABELS.get(settings.scoring.ppr, "Standard (0.0)"),
+            "roster_slots": settings.roster_slots,
+            "faab_budget": settings.faab_budget or 100,
+            "roster_count": len(roster_detail),
+            "roster_json": _json.dumps_str(roster_detail, indent=True),
+            "news_block": "\n".join(news_summary),
+            "rostered_names": ', '.join(rostered[:100]),
+            "rostered_more": len(rostered) - 100,
+            "tx_json": _json.dumps_str(context['transactions'][:3], indent=True),
+            "matchup_json": _json.dumps_str(context['matchups'][:3], indent=True),
+        })
+
         # Call OpenAI
         response = ask(
             messages=[{"role": "user", "content": prompt}],
@@ -201,7 +257,8 @@ Format as markdown. Be concise but specific."""
             "ai_generated": True,
             "context": context,
             "raw_response": ai_body,
-            "settings": settings.model_dump(),
+            # Already dumped once by _get_league_context
+            "settings": context["settings"],
         }
 
         return "🤖 AI GM Brief", ai_body, payload
@@ -211,10 +268,20 @@ Format as markdown. Be concise but specific."""
         return _build_data_brief(settings, context, str(e))
 
 
+_BRIEF_POSITIONS = ('QB', 'RB', 'WR', 'TE', 'K', 'DEF')
+
+
 def _build_data_brief(settings: LeagueSettings, context: Dict, error: str) -> Tuple[str, str, Dict]:
     """Data-driven brief when AI is unavailable."""
 
-    # Build intelligent fallback using actual data
+    # Group names by position in one pass
+    by_pos: Dict[str, List[str]] = defaultdict(list)
+    for p in context['my_roster']:
+        name = p.get('name')
+        if name:
+            by_pos[p.get('position') or 'UNKNOWN'].append(name)
+
+    # Build intelligent fallback using actual data, one list instead of incremental appends
     body_lines = [
         "## 📊 GM Brief",
         "",
@@ -224,22 +291,7 @@ def _build_data_brief(settings: LeagueSettings, context: Dict, error: str) -> Tu
         f"- **FAAB Budget:** ${settings.faab_budget or 100}",
         "",
         "### Current Roster",
-    ]
-
-    # Group by position
-    by_pos = {}
-    for p in context['my_roster']:
-        pos = p.get('position') or 'UNKNOWN'
-        by_pos.setdefault(pos, []).append(p)
-
-    for pos in ['QB', 'RB', 'WR', 'TE', 'K', 'DEF']:
-        players = by_pos.get(pos, [])
-        if players:
-            names = [p.get('name', 'Unknown') for p in players if p.get('name')]
-            if names:
-                body_lines.append(f"- **{pos}:** {', '.join(names)}")
-
-    body_lines.extend([
+        *(f"- **{pos}:** {', '.join(names)}" for pos in _BRIEF_POSITIONS if (names := by_pos.get(pos))),
         "",
         "### Recent League Activity",
         f"- {len(context['transactions'])} transactions in database",
@@ -251,7 +303,7 @@ def _build_data_brief(settings: LeagueSettings, context: Dict, error: str) -> Tu
         "- Scout trade opportunities with league managers",
         "",
         "---",
-    ])
+    ]
 
     # Add helpful message based on error type
     if "insufficient_quota" in error or "RateLimitError" in error:
@@ -20,6 +20,12 @@ class Settings(BaseSettings):
     league_key: Optional[str] = None
     team_key: Optional[str] = None
 
+    # Server: size of the threadpool that runs sync routes (AnyIO's default is 40)
+    worker_threads: int = 100
+
+    # Compiled Jinja templates (default: app/.cache/jinja)
+    jinja_cache_dir: Optional[str] = None
+
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -1,6 +1,11 @@
 import os
+import queue
 import sqlite3
-from typing import Iterator
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
 
 
 def get_db_path() -> str:
@@ -13,9 +18,193 @@ def get_connection() -> sqlite3.Connection:
     return connection
 
 
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+class ConnectionPool:
+    """Long-lived connections for one database file: a single locked writer and a LIFO of readers.
+
+    Readers are opened read-only; WAL lets them run alongside the writer.
+    """
+
+    def __init__(self, path: str, max_readers: int = 8) -> None:
+        self.path = path
+        self.max_readers = max_readers
+        self._writer_lock = threading.RLock()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        # Opening the writer first creates the file, so read-only readers can attach
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.row_factory = sqlite3.Row
+        for pragma in _PRAGMAS:
+            self._writer.execute(pragma)
+        st = os.stat(path)
+        self.identity: Tuple[int, int] = (st.st_dev, st.st_ino)
+        # Read-only connection used only for change_token(), with its own lock so polling
+        # it never waits behind a write in progress
+        self._watch = self._open_reader()
+        self._watch_lock = threading.Lock()
+
+    def _open_reader(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA cache_size=-65536")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        connection.execute("PRAGMA mmap_size=268435456")
+        return connection
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._readers.get_nowait()
+        except queue.Empty:
+            connection = self._open_reader()
+        try:
+            yield connection
+        finally:
+            if self._readers.qsize() < self.max_readers:
+                self._readers.put(connection)
+            else:
+                connection.close()
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Yield the writer under its lock; commits on success, rolls back on error."""
+        with self._writer_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    def change_token(self) -> int:
+        """A value that changes whenever anything is committed to this database.
+
+        This is ``PRAGMA data_version`` on a dedicated read-only connection: it moves on
+        every commit from any other connection, which includes this pool's writer and
+        other processes. Each call runs that one pragma; the writer lock is not taken.
+        """
+        with self._watch_lock:
+            return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self) -> None:
+        with self._writer_lock:
+            self._writer.close()
+        with self._watch_lock:
+            self._watch.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_POOLS: Dict[str, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(path: Optional[str] = None) -> ConnectionPool:
+    """Return the pool for ``path`` (default: DB_PATH), reopening it if the file was replaced."""
+    path = path or get_db_path()
+    pool = _POOLS.get(path)
+    if pool is not None:
+        try:
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) == pool.identity:
+                return pool
+        except FileNotFoundError:
+            pass
+    with _POOLS_LOCK:
+        stale = _POOLS.pop(path, None)
+        if stale is not None and stale is not pool:
+            # Another thread already rebuilt it
+            _POOLS[path] = stale
+            return stale
+        if stale is not None:
+            stale.close()
+        pool = _POOLS[path] = ConnectionPool(path)
+        return pool
+
+
+@contextmanager
+def get_reader(path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled read-only connection (returned to the pool, not closed)."""
+    with get_pool(path).reader() as connection:
+        yield connection
+
+
+@contextmanager
+def get_writer(path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Borrow the pooled writer connection; the block is committed on exit."""
+    with get_pool(path).writer() as connection:
+        yield connection
+
+
+# (db path, name) -> (pool, change token, value) for cached_read()
+_READ_CACHE: Dict[Tuple[str, str], Tuple[ConnectionPool, int, Any]] = {}
+
+
+def cached_read(
+    name: str,
+    compute: Callable[[sqlite3.Connection], T],
+    *,
+    connection: Optional[sqlite3.Connection] = None,
+    path: Optional[str] = None,
+) -> T:
+    """Return ``compute(connection)``, reusing the last result until the database changes.
+
+    ``compute`` must be a pure read; callers must not mutate the returned value. A hit
+    costs one ``PRAGMA data_version`` (see ConnectionPool.change_token). Without
+    ``connection`` a pooled reader is borrowed, and only on a cache miss.
+    """
+    pool = get_pool(path)
+    # Read the token before computing: a commit in between only forces a recompute next time
+    token = pool.change_token()
+    key = (pool.path, name)
+    cached = _READ_CACHE.get(key)
+    if cached is not None and cached[0] is pool and cached[1] == token:
+        return cached[2]
+    if connection is not None:
+        value = compute(connection)
+        # Uncommitted rows seen through a caller's open write transaction may be rolled back
+        if connection.in_transaction:
+            return value
+    else:
+        with pool.reader() as borrowed:
+            value = compute(borrowed)
+    _READ_CACHE[key] = (pool, token, value)
+    return value
+
+
+def close_pools() -> None:
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.close()
+        _POOLS.clear()
+
+
+# Inbox listing (unread first, newest first), the same filtered by kind, the unread count
+# (partial index: only unread rows) and latest_settings_payload's title lookup
+NOTIFICATION_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_notifications_read_created ON notifications(is_read, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_notifications_kind_read_created"
+    " ON notifications(kind, is_read, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications(is_read) WHERE is_read = 0",
+    "CREATE INDEX IF NOT EXISTS idx_notifications_title_created ON notifications(title, created_at DESC)",
+)
+
+
 def migrate() -> None:
     connection = get_connection()
     try:
+        # WAL is persistent in the file; the other pragmas are per-connection and set by the pool
+        connection.execute("PRAGMA journal_mode=WAL")
         cursor = connection.cursor()
         cursor.execute(
             """
@@ -30,6 +219,8 @@ def migrate() -> None:
             );
             """
         )
+        for sql in NOTIFICATION_INDEXES:
+            cursor.execute(sql)
         connection.commit()
     finally:
         connection.close()
@@ -1,111 +1,300 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, Iterable, List, Optional
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .db import get_connection
+from . import _json
+from .db import cached_read, get_db_path, get_reader, get_writer
 
 
-def notify(kind: str, title: str, body: str, payload: Optional[Dict[str, Any]] = None) -> int:
-    connection = get_connection()
-    try:
-        cursor = connection.cursor()
-        cursor.execute(
+logger = logging.getLogger(__name__)
+
+# Deferred notifications: rows are queued with a Future and written in batches by a daemon
+# thread; each Future resolves to the row's AUTOINCREMENT id once its batch commits.
+# _WRITE_LOCK serialises flushes with synchronous inserts so rows land in call order.
+_Deferred = Tuple[str, Tuple[Any, ...], "Future[int]"]
+_DEFERRED: "queue.Queue[_Deferred]" = queue.Queue()
+_WRITE_LOCK = threading.Lock()
+_FLUSH_INTERVAL_S = 0.1
+_FLUSH_BATCH = 100
+_flush_wanted = threading.Event()
+_worker: Optional[threading.Thread] = None
+
+
+def _insert_notification(kind: str, title: str, body: str, payload: Optional[Dict[str, Any]]) -> int:
+    with get_writer() as connection:
+        cursor = connection.execute(
             "INSERT INTO notifications(kind, title, body, payload) VALUES(?, ?, ?, ?)",
-            (kind, title, body, json.dumps(payload or {})),
+            (kind, title, body, _json.dumps_str(payload or {})),
         )
-        connection.commit()
         return int(cursor.lastrowid)
-    finally:
-        connection.close()
 
 
-def list_notifications(kind: Optional[str] = None) -> List[Dict[str, Any]]:
-    connection = get_connection()
-    try:
-        cursor = connection.cursor()
-        if kind:
-            cursor.execute(
-                "SELECT * FROM notifications WHERE kind = ? ORDER BY is_read ASC, created_at DESC",
-                (kind,),
-            )
-        else:
-            cursor.execute("SELECT * FROM notifications ORDER BY is_read ASC, created_at DESC")
-        rows = cursor.fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        connection.close()
-
-
-def get_notification(notification_id: int) -> Optional[Dict[str, Any]]:
-    connection = get_connection()
+def notify(kind: str, title: str, body: str, payload: Optional[Dict[str, Any]] = None) -> int:
+    with _WRITE_LOCK:
+        if not _DEFERRED.empty():
+            try:
+                _flush_locked()
+            except Exception:
+                # The queued rows were put back; a synchronous write must not fail on them
+                logger.exception("deferred notification flush failed")
+        return _insert_notification(kind, title, body, payload)
+
+
+def _flush_locked() -> int:
+    by_path: Dict[str, List[Tuple[Tuple[Any, ...], "Future[int]"]]] = {}
+    while True:
+        try:
+            path, row, future = _DEFERRED.get_nowait()
+        except queue.Empty:
+            break
+        by_path.setdefault(path, []).append((row, future))
+    written = 0
+    for path, pending in list(by_path.items()):
+        try:
+            with get_writer(path) as connection:
+                ids = [
+                    int(connection.execute(
+                        "INSERT INTO notifications(kind, title, body, payload) VALUES(?, ?, ?, ?)", row
+                    ).lastrowid)
+                    for row, _ in pending
+                ]
+        except Exception:
+            # Nothing from this path was committed: requeue it (and any path not reached yet)
+            logger.warning("requeueing %d deferred notification(s) for %s", len(pending), path)
+            for retry_path, retry in by_path.items():
+                for row, future in retry:
+                    _DEFERRED.put((retry_path, row, future))
+            raise
+        del by_path[path]
+        for (_, future), msg_id in zip(pending, ids):
+            future.set_result(msg_id)
+        written += len(ids)
+    return written
+
+
+def flush_deferred() -> int:
+    """Write any queued notify_deferred() rows now; returns the number written.
+
+    On failure the rows stay queued for the next flush and the error is raised.
+    """
+    with _WRITE_LOCK:
+        return _flush_locked()
+
+
+def _flush_loop() -> None:
+    while True:
+        _flush_wanted.wait(_FLUSH_INTERVAL_S)
+        _flush_wanted.clear()
+        if not _DEFERRED.empty():
+            try:
+                flush_deferred()
+            except Exception:
+                # Keep the writer alive; the rows were requeued and are retried next tick
+                logger.exception("deferred notification flush failed")
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    # The flush thread is a daemon; don't drop rows still queued when the process exits
     try:
-        cursor = connection.cursor()
+        flush_deferred()
+    except Exception:
+        logger.exception("dropping %d deferred notification(s) at exit", _DEFERRED.qsize())
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_flush_loop, name="inbox-flush", daemon=True)
+        _worker.start()
+
+
+def notify_deferred(
+    kind: str, title: str, body: str, payload: Optional[Dict[str, Any]] = None
+) -> "Future[int]":
+    """Like notify(), but the row is written by a background batch flush.
+
+    Returns a Future that resolves to the row's id once it is written, within ~100ms
+    (or on the next notify()/flush_deferred() call).
+    """
+    future: "Future[int]" = Future()
+    _DEFERRED.put((get_db_path(), (kind, title, body, _json.dumps_str(payload or {})), future))
+    _ensure_worker()
+    if _DEFERRED.qsize() >= _FLUSH_BATCH:
+        _flush_wanted.set()
+    return future
+
+
+_LIST_COLUMNS = "id, kind, title, is_read, created_at"
+_LIST_COLUMNS_WITH_BODY = "id, kind, title, body, is_read, created_at"
+
+
+def _list_query(
+    kind: Optional[str], include_body: bool, limit: Optional[int], offset: int
+) -> Tuple[str, List[Any]]:
+    columns = _LIST_COLUMNS_WITH_BODY if include_body else _LIST_COLUMNS
+    where, params = ("WHERE kind = ?", [kind]) if kind else ("", [])
+    sql = f"SELECT {columns} FROM notifications {where} ORDER BY is_read ASC, created_at DESC LIMIT ? OFFSET ?"
+    params += [-1 if limit is None else limit, offset]
+    return sql, params
+
+
+def iter_notifications(
+    kind: Optional[str] = None, *, include_body: bool = False, limit: Optional[int] = None, offset: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """Yield notifications (unread first, newest first) without materializing the result set.
+
+    ``payload`` is never selected; ``body`` only with ``include_body=True``. Use
+    get_notification() for a single full row.
+    """
+    sql, params = _list_query(kind, include_body, limit, offset)
+    with get_reader() as connection:
+        cursor = connection.execute(sql, params)
+        while rows := cursor.fetchmany(128):
+            yield from (dict(r) for r in rows)
+
+
+def list_notifications(
+    kind: Optional[str] = None, *, include_body: bool = False, limit: int = 200, offset: int = 0
+) -> List[Dict[str, Any]]:
+    """One page of notifications; see iter_notifications() for columns and ordering."""
+    return list(iter_notifications(kind, include_body=include_body, limit=limit, offset=offset))
+
+
+@contextmanager
+def _reading(connection: Optional[sqlite3.Connection]) -> Iterator[sqlite3.Connection]:
+    # Use the caller's connection (e.g. one per request) or borrow a pooled reader
+    if connection is not None:
+        yield connection
+    else:
+        with get_reader() as borrowed:
+            yield borrowed
+
+
+def get_notification(
+    notification_id: int, *, connection: Optional[sqlite3.Connection] = None
+) -> Optional[Dict[str, Any]]:
+    with _reading(connection) as conn:
+        cursor = conn.cursor()
         cursor.execute("SELECT * FROM notifications WHERE id = ?", (notification_id,))
         row = cursor.fetchone()
         return dict(row) if row else None
-    finally:
-        connection.close()
 
 
-def mark_read(notification_id: int) -> None:
-    connection = get_connection()
-    try:
-        cursor = connection.cursor()
-        cursor.execute("UPDATE notifications SET is_read = 1 WHERE id = ?", (notification_id,))
-        connection.commit()
-    finally:
-        connection.close()
+def get_inbox_detail(
+    notification_id: int, *, connection: Optional[sqlite3.Connection] = None
+) -> Optional[Dict[str, Any]]:
+    """Return a notification's payload with agent-run references expanded.
 
+    Agent briefs store only ``state_ref`` (the agent run id); the league state and
+    waiver results are rebuilt here from that run's tool calls.
+    """
+    from .store import decode_log_payload
 
-def unread_count() -> int:
-    connection = get_connection()
-    try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT COUNT(1) AS unread FROM notifications WHERE is_read = 0")
+    with _reading(connection) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT payload FROM notifications WHERE id = ?", (notification_id,))
         row = cursor.fetchone()
-        return int(row[0]) if row else 0
-    finally:
-        connection.close()
+        if row is None:
+            return None
+        payload = _json.loads(row[0]) if row[0] else {}
+        run_id = payload.get("state_ref") if isinstance(payload, dict) else None
+        if run_id is None:
+            return payload
+        cursor.execute(
+            "SELECT name, result, error FROM tool_calls WHERE run_id = ? ORDER BY id",
+            (run_id,),
+        )
+        calls = {r["name"]: r for r in cursor.fetchall()}
+
+    state = calls.get("get_league_state")
+    waivers = calls.get("rank_waivers")
+    payload["state"] = decode_log_payload(state["result"]) if state is not None else {}
+    if waivers is None:
+        payload["waivers"] = {"recommendations": []}
+    elif waivers["error"]:
+        payload["waivers"] = {"error": waivers["error"], "recommendations": []}
+    else:
+        payload["waivers"] = decode_log_payload(waivers["result"])
+    return payload
+
+
+def mark_read(notification_id: int) -> None:
+    with get_writer() as connection:
+        connection.execute("UPDATE notifications SET is_read = 1 WHERE id = ?", (notification_id,))
+
+
+def _count_unread(connection: sqlite3.Connection) -> int:
+    row = connection.execute("SELECT COUNT(1) AS unread FROM notifications WHERE is_read = 0").fetchone()
+    return int(row[0]) if row else 0
+
+
+def unread_count(*, connection: Optional[sqlite3.Connection] = None) -> int:
+    """Number of unread notifications, cached until the database next changes."""
+    return cached_read("inbox.unread_count", _count_unread, connection=connection)
 
 
 def mark_all_read() -> int:
-    connection = get_connection()
-    try:
-        cursor = connection.cursor()
-        cursor.execute("UPDATE notifications SET is_read = 1 WHERE is_read = 0")
-        connection.commit()
+    with get_writer() as connection:
+        cursor = connection.execute("UPDATE notifications SET is_read = 1 WHERE is_read = 0")
         return cursor.rowcount
-    finally:
-        connection.close()
 
 
-def latest_settings_payload() -> Optional[Dict[str, Any]]:
-    connection = get_connection()
+def _latest_settings_raw(connection: sqlite3.Connection) -> Optional[str]:
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT payload FROM notifications WHERE title = ? ORDER BY created_at DESC LIMIT 1",
+        ("Detected League Settings",),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def latest_settings_payload(*, connection: Optional[sqlite3.Connection] = None) -> Optional[Dict[str, Any]]:
+    # The row is cached until the database changes; decoding per call hands every
+    # caller its own dict
+    raw = cached_read("inbox.latest_settings", _latest_settings_raw, connection=connection)
     try:
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT payload FROM notifications WHERE title = ? ORDER BY created_at DESC LIMIT 1",
-            ("Detected League Settings",),
-        )
-        row = cursor.fetchone()
-        if not row:
-            return None
-        try:
-            return json.loads(row[0]) if row[0] else None
-        except Exception:
-            return None
-    finally:
-        connection.close()
+        return _json.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
+def get_home_payload(
+    kind: Optional[str] = None, *, limit: int = 200, connection: Optional[sqlite3.Connection] = None
+) -> Dict[str, Any]:
+    """Everything the inbox page needs, read on one connection (pooled unless given).
+
+    ``rows`` is list_notifications(kind, include_body=True, limit=limit), ``unread`` is
+    unread_count() and ``settings`` is latest_settings_payload().
+    """
+    sql, params = _list_query(kind, True, limit, 0)
+    with _reading(connection) as conn:
+        rows = [dict(r) for r in conn.execute(sql, params)]
+        unread = unread_count(connection=conn)
+        settings = latest_settings_payload(connection=conn)
+    return {"rows": rows, "unread": unread, "settings": settings}
 
 
 __all__ = [
     "notify",
+    "notify_deferred",
+    "flush_deferred",
     "list_notifications",
+    "iter_notifications",
     "get_notification",
+    "get_inbox_detail",
     "mark_read",
     "unread_count",
     "latest_settings_payload",
+    "get_home_payload",
 ]
 
 
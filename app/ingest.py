@@ -1,46 +1,192 @@
 from __future__ import annotations
 
 import hashlib
-import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from pydantic import ValidationError
+
+from . import _json
 from .models import LeagueSettings
-from .store import upsert_player, upsert_team, upsert_roster, upsert_matchup, insert_transaction_raw
+from .store import (
+    insert_transactions_raw_many,
+    upsert_matchups_many,
+    upsert_players_many,
+    upsert_rosters_many,
+    upsert_teams_many,
+)
 from .yahoo_client import YahooClient
 
 
 def _cache_key_for(path: str, params: Optional[Dict[str, Any]]) -> str:
-    base = path.strip()
-    if params:
-        items = sorted((str(k), str(v)) for k, v in params.items())
-        qs = "&".join(f"{k}={v}" for k, v in items)
-        base = f"{base}?{qs}"
-    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+    if not params:
+        return _cache_key(path, ())
+    # Call sites pass str params; only coerce when something else slips through
+    if all(type(k) is str and type(v) is str for k, v in params.items()):
+        items = tuple(sorted(params.items()))
+    else:
+        items = tuple(sorted((str(k), str(v)) for k, v in params.items()))
+    return _cache_key(path, items)
+
+
+@lru_cache(maxsize=256)
+def _cache_key(path: str, items: Tuple[Tuple[str, str], ...]) -> str:
+    # Filename key only, not a security boundary: blake2b is cheaper than sha1 for short inputs
+    # One buffer and one hash call; the byte layout (and so every cached filename) is unchanged
+    buf = bytearray(path.strip().encode("utf-8"))
+    for k, v in items:
+        buf += b"\x00"
+        buf += k.encode("utf-8")
+        buf += b"="
+        buf += v.encode("utf-8")
+    return hashlib.blake2b(buf, digest_size=20).hexdigest()
+
+
+# In-process copy of recently read/written cache files, keyed by (dir, key) and validated
+# against the file's mtime so repeated ingests in one process skip the read and decode.
+# Entries are shared; callers must treat them as read-only.
+_MEM_CACHE: "OrderedDict[Tuple[str, str], Tuple[int, Dict[str, Any]]]" = OrderedDict()
+_MEM_CACHE_MAX = 64
+_MEM_CACHE_LOCK = threading.Lock()
+
+
+def _mem_put(cache_dir: Path, key: str, mtime_ns: int, data: Dict[str, Any]) -> None:
+    with _MEM_CACHE_LOCK:
+        _MEM_CACHE[(str(cache_dir), key)] = (mtime_ns, data)
+        _MEM_CACHE.move_to_end((str(cache_dir), key))
+        while len(_MEM_CACHE) > _MEM_CACHE_MAX:
+            _MEM_CACHE.popitem(last=False)
+
+
+def _load_file(file_path: Path) -> Tuple[int, Any]:
+    # Map the file and hand the buffer straight to the decoder: no intermediate str copy
+    with open(file_path, "rb") as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file; mmap refuses zero-length maps
+            return mtime_ns, _json.loads(b"")
+        try:
+            with memoryview(mm) as buf:
+                return mtime_ns, _json.loads(buf)
+        finally:
+            mm.close()
 
 
 def _cache_read(cache_dir: Path, key: str) -> Optional[Dict[str, Any]]:
     file_path = cache_dir / f"{key}.json"
-    if file_path.exists():
-        return json.loads(file_path.read_text(encoding="utf-8"))
-    return None
+    try:
+        mtime_ns = file_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _MEM_CACHE_LOCK:
+        hit = _MEM_CACHE.get((str(cache_dir), key))
+        if hit is not None and hit[0] == mtime_ns:
+            _MEM_CACHE.move_to_end((str(cache_dir), key))
+            return hit[1]
+    try:
+        mtime_ns, data = _load_file(file_path)
+    except FileNotFoundError:
+        return None
+    if isinstance(data, dict):
+        _mem_put(cache_dir, key, mtime_ns, data)
+    return data
+
+
+_ENSURED_DIRS: Set[Path] = set()
 
 
 def _cache_write(cache_dir: Path, key: str, data: Dict[str, Any]) -> None:
-    cache_dir.mkdir(parents=True, exist_ok=True)
+    if cache_dir not in _ENSURED_DIRS:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(cache_dir)
     file_path = cache_dir / f"{key}.json"
-    file_path.write_text(json.dumps(data), encoding="utf-8")
+    # Write a private temp file and rename it into place, so readers and concurrent
+    # writers of the same key only ever see a complete file. No fsync: the cache is
+    # disposable and refetched on a miss.
+    tmp_path = cache_dir / f"{key}.json.{os.getpid()}.{threading.get_ident()}.tmp"
+    payload = memoryview(_json.dumps(data))
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    try:
+        fd = os.open(tmp_path, flags, 0o644)
+    except FileNotFoundError:
+        # The directory was removed after we first created it
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp_path, flags, 0o644)
+    try:
+        try:
+            while payload:
+                payload = payload[os.write(fd, payload):]
+            mtime_ns = os.fstat(fd).st_mtime_ns
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        # Don't leave a partial temp file behind in the cache dir
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _mem_put(cache_dir, key, mtime_ns, data)
+
+
+def _validators(cache_dir: Path, key: str) -> Dict[str, str]:
+    """Conditional-request headers from the ``{key}.meta.json`` sidecar, if any."""
+    meta = _cache_read(cache_dir, f"{key}.meta") or {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def _store_validators(cache_dir: Path, key: str, response: Any) -> None:
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        _cache_write(cache_dir, f"{key}.meta", {"etag": etag, "last_modified": last_modified})
+    else:
+        # Don't revalidate the new body against an older response's validators
+        (cache_dir / f"{key}.meta.json").unlink(missing_ok=True)
 
 
 def _get_or_fetch_json(
-    client: YahooClient, path: str, *, params: Optional[Dict[str, Any]], cache_dir: Path
+    client: YahooClient,
+    path: str,
+    *,
+    params: Optional[Dict[str, Any]],
+    cache_dir: Path,
+    revalidate: bool = False,
 ) -> Dict[str, Any]:
+    """Cached JSON for an endpoint.
+
+    A cache hit is returned without a request unless ``revalidate`` is set; then the
+    stored ETag/Last-Modified are sent and a 304 keeps the cached body. Entries without
+    validators are refetched in full.
+    """
     key = _cache_key_for(path, params)
     cached = _cache_read(cache_dir, key)
+    headers: Dict[str, str] = {}
     if cached is not None:
-        return cached
+        if not revalidate:
+            return cached
+        headers = _validators(cache_dir, key)
     try:
-        response = client.get(path, params=params)
+        if headers:
+            response = client.get(path, params=params, headers=headers)
+            if response.status_code == 304:
+                return cached  # type: ignore[return-value]
+        else:
+            response = client.get(path, params=params)
         response.raise_for_status()
     except Exception as e:
         # Surface response body if available for better diagnostics
@@ -53,23 +199,78 @@ def _get_or_fetch_json(
         if body:
             msg += f" | body={body}"
         raise RuntimeError(msg)
-    data = response.json()
+    # Decode the body bytes with orjson rather than httpx's stdlib-json response.json()
+    data = _json.loads(response.content)
     if isinstance(data, dict):
         _cache_write(cache_dir, key, data)
+        _store_validators(cache_dir, key, response)
     return data
 
 
+# Endpoints chosen to cover core artifacts, as suffixes of league/{league_key}
+_ENDPOINT_SUFFIXES = (
+    ("teams", "/teams"),
+    ("players", "/players"),
+    ("matchups", "/scoreboard"),
+    ("standings", "/standings"),
+    ("transactions", "/transactions"),
+)
+_ROSTERS_SUFFIX = "/teams;out=roster"
+# Keep the historical key order: league, endpoints, rosters, my_roster
+_BUNDLE_ORDER = ("league", *(name for name, _ in _ENDPOINT_SUFFIXES), "rosters", "my_roster")
+
+
+def bundle_endpoints(league_key: str) -> Dict[str, str]:
+    """Bundle key -> Yahoo path for the league-level sections of fetch_league_bundle()."""
+    base = f"league/{league_key}"
+    return {
+        "league": base,
+        **{name: base + suffix for name, suffix in _ENDPOINT_SUFFIXES},
+        "rosters": base + _ROSTERS_SUFFIX,
+    }
+
+
 def fetch_league_bundle(
-    client: YahooClient, league_key: str, *, cache_dir: Optional[str] = None
+    client: YahooClient, league_key: str, *, cache_dir: Optional[str] = None, revalidate: bool = False
 ) -> Dict[str, Any]:
+    """Fetch the league and its core endpoints, served from the response cache.
+
+    With ``revalidate=True`` every cached endpoint is rechecked with a conditional GET.
+    """
     cd = Path(cache_dir or ".cache")
     bundle: Dict[str, Any] = {}
 
-    # First get league data to find current week
-    league_data = _get_or_fetch_json(client, f"league/{league_key}", params={"format": "json"}, cache_dir=cd)
-    bundle["league"] = league_data
+    base = f"league/{league_key}"
+
+    def fetch(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return _get_or_fetch_json(client, path, params=params, cache_dir=cd, revalidate=revalidate)
+
+    # Requests are independent and I/O bound, so run them concurrently: the league
+    # (needed for the current week) alongside the standard endpoints, then the
+    # week-dependent roster fetches. Cache hits are resolved inline; the executor only
+    # starts worker threads for real misses, so a warm bundle never spawns any.
+    with ThreadPoolExecutor(max_workers=len(_ENDPOINT_SUFFIXES) + 1) as pool:
+
+        def submit(path: str, params: Dict[str, Any]) -> "Future[Dict[str, Any]]":
+            cached = None if revalidate else _cache_read(cd, _cache_key_for(path, params))
+            if cached is None:
+                return pool.submit(fetch, path, params)
+            done: "Future[Dict[str, Any]]" = Future()
+            done.set_result(cached)
+            return done
 
-    # Extract current week
+        league_future = submit(base, {"format": "json"})
+        endpoint_futures = {name: submit(base + suffix, {"format": "json"}) for name, suffix in _ENDPOINT_SUFFIXES}
+        league_data = league_future.result()
+        bundle["league"] = league_data
+        bundle.update(_fetch_rosters(submit, league_key, _current_week(league_data)))
+        for name, future in endpoint_futures.items():
+            bundle[name] = future.result()
+
+    return {k: bundle[k] for k in _BUNDLE_ORDER if k in bundle}
+
+
+def _current_week(league_data: Dict[str, Any]) -> Any:
     current_week = None
     try:
         fc = league_data.get("fantasy_content", {})
@@ -80,32 +281,24 @@ def fetch_league_bundle(
                 current_week = league_obj.get("current_week")
     except:
         current_week = None
+    return current_week
 
-    # Endpoints chosen to cover core artifacts
-    endpoints = {
-        "teams": f"league/{league_key}/teams",
-        "players": f"league/{league_key}/players",
-        "matchups": f"league/{league_key}/scoreboard",
-        "standings": f"league/{league_key}/standings",
-        "transactions": f"league/{league_key}/transactions",
-    }
-
-    # Standard endpoints (except rosters which need special handling)
-    for name, ep in endpoints.items():
-        bundle[name] = _get_or_fetch_json(client, ep, params={"format": "json"}, cache_dir=cd)
 
+def _fetch_rosters(
+    submit: Callable[[str, Dict[str, Any]], "Future[Dict[str, Any]]"], league_key: str, current_week: Any
+) -> Dict[str, Any]:
     # For rosters with actual lineup positions, we need to fetch individual team rosters
     # because league-level teams;out=roster doesn't include selected_position data
     # To avoid N API calls, we'll fetch:
     # 1. All rosters via teams;out=roster (player lists without positions)
     # 2. Individual team roster for the user's team to get their lineup
 
-    roster_ep = f"league/{league_key}/teams;out=roster"
+    roster_ep = f"league/{league_key}{_ROSTERS_SUFFIX}"
     roster_params = {"format": "json"}
     if current_week:
         roster_params["week"] = str(current_week)
 
-    bundle["rosters"] = _get_or_fetch_json(client, roster_ep, params=roster_params, cache_dir=cd)
+    futures = {"rosters": submit(roster_ep, roster_params)}
 
     # Now fetch YOUR team's roster with lineup positions
     # Get team_key from env
@@ -115,23 +308,276 @@ def fetch_league_bundle(
         team_roster_ep = f"team/{cfg.team_key}/roster"
         team_roster_params = {"format": "json", "week": str(current_week)}
         print(f"[INGEST] Fetching your team's lineup for week {current_week}")
-        bundle["my_roster"] = _get_or_fetch_json(client, team_roster_ep, params=team_roster_params, cache_dir=cd)
+        futures["my_roster"] = submit(team_roster_ep, team_roster_params)
 
-    return bundle
+    return {name: future.result() for name, future in futures.items()}
 
 
 def ingest(client: YahooClient, league_key: str, *, cache_dir: Optional[str] = None) -> Tuple[Dict[str, Any], LeagueSettings]:
     bundle = fetch_league_bundle(client, league_key, cache_dir=cache_dir)
     # Prefer league.settings if present, otherwise pass entire league dict
     league_raw = bundle.get("league", {})
-    settings = LeagueSettings.from_yahoo(league_raw)
+    settings = _league_settings(Path(cache_dir or ".cache"), league_key, league_raw)
     return bundle, settings
 
 
+def _league_settings(cache_dir: Path, league_key: str, league_raw: Dict[str, Any]) -> LeagueSettings:
+    """LeagueSettings for the cached league response, reusing a parsed sidecar when current.
+
+    The sidecar ``{key}.settings.json`` records the mtime of the league file it was parsed
+    from; a refetch rewrites the league file and so invalidates it.
+    """
+    key = _cache_key_for(f"league/{league_key}", {"format": "json"})
+    try:
+        source_mtime_ns = (cache_dir / f"{key}.json").stat().st_mtime_ns
+    except FileNotFoundError:
+        return LeagueSettings.from_yahoo(league_raw)
+    sidecar = _cache_read(cache_dir, f"{key}.settings")
+    if isinstance(sidecar, dict) and sidecar.get("source_mtime_ns") == source_mtime_ns:
+        try:
+            return LeagueSettings.model_validate(sidecar["settings"])
+        except (ValidationError, KeyError, TypeError):
+            pass  # Written by an older model version; reparse below
+    settings = LeagueSettings.from_yahoo(league_raw)
+    _cache_write(
+        cache_dir,
+        f"{key}.settings",
+        {"source_mtime_ns": source_mtime_ns, "settings": settings.model_dump(mode="json")},
+    )
+    return settings
+
+
+# Flat row builders for the list-shaped bundle (already-normalized payloads). Each makes one
+# pass over its entity and returns parallel column lists that zip() straight into the
+# upsert_*_many row tuples.
+
+
+def _flatten_teams(raw_teams: List[Any]) -> Tuple[List[str], List[str], List[Any], List[Any]]:
+    ids: List[str] = []
+    names: List[str] = []
+    managers: List[Any] = []
+    abbrevs: List[Any] = []
+    for t in raw_teams:
+        if type(t) is not dict:
+            continue
+        get = t.get
+        tid = str(get("team_id") or get("id") or get("team_key") or "")
+        team = get("team")
+        name = get("name") or (team.get("name") if team else None) or tid
+        if type(name) is dict:
+            name = name.get("full") or name.get("display") or tid
+        mgrs = get("managers")
+        manager = (mgrs[0].get("nickname") if mgrs else None) if type(mgrs) is list else None
+        abbrev = (team.get("abbr") if team else None) or get("abbrev")
+        if tid and name:
+            ids.append(tid)
+            names.append(str(name))
+            managers.append(manager)
+            abbrevs.append(abbrev)
+    return ids, names, managers, abbrevs
+
+
+def _flatten_players(
+    raw_players: List[Any],
+) -> Tuple[List[str], List[str], List[Optional[str]], List[Optional[str]], List[Optional[int]]]:
+    ids: List[str] = []
+    names: List[str] = []
+    positions: List[Optional[str]] = []
+    teams: List[Optional[str]] = []
+    bye_weeks: List[Optional[int]] = []
+    for p in raw_players:
+        if type(p) is not dict:
+            continue
+        get = p.get
+        pid = str(get("player_id") or get("id") or get("player_key") or "")
+        player = get("player")
+        name = get("name") or (player.get("name") if player else None) or pid
+        if type(name) is dict:
+            name = name.get("full") or name.get("display") or pid
+        pos = get("position") or get("display_position") or (player.get("display_position") if player else None)
+        team = get("editorial_team_abbr") or (player.get("editorial_team_abbr") if player else None)
+        byes = get("bye_weeks")
+        bye = get("bye_week") or (byes.get("week") if byes else None)
+        if pid and name:
+            ids.append(pid)
+            names.append(str(name))
+            positions.append(str(pos) if pos else None)
+            teams.append(str(team) if team else None)
+            bye_weeks.append(int(bye) if bye else None)
+    return ids, names, positions, teams, bye_weeks
+
+
+def _flatten_rosters(
+    raw_rosters: List[Any],
+) -> Tuple[List[str], List[str], List[int], List[Any], List[Any]]:
+    team_ids: List[str] = []
+    player_ids: List[str] = []
+    weeks: List[int] = []
+    statuses: List[Any] = []
+    slots: List[Any] = []
+    for r in raw_rosters:
+        if type(r) is not dict:
+            continue
+        get = r.get
+        team_id = str(get("team_id") or get("teamKey") or get("team_key") or "")
+        week_val = get("week")
+        week = int(week_val) if isinstance(week_val, (int, str)) and str(week_val).isdigit() else 0
+        entries = get("entries")
+        if not (team_id and week and type(entries) is list):
+            continue
+        for entry in entries:
+            if type(entry) is not dict:
+                continue
+            eget = entry.get
+            pid = str(eget("player_id") or eget("id") or eget("player_key") or "")
+            if pid:
+                team_ids.append(team_id)
+                player_ids.append(pid)
+                weeks.append(week)
+                statuses.append(eget("status"))
+                slots.append(eget("slot") or eget("position"))
+    return team_ids, player_ids, weeks, statuses, slots
+
+
+def _flatten_matchups(raw_matchups: List[Any]) -> List[Tuple[Any, ...]]:
+    # Each pairing is stored from both sides, so this returns row tuples rather than columns
+    rows: List[Tuple[Any, ...]] = []
+    append = rows.append
+    for m in raw_matchups:
+        if type(m) is not dict:
+            continue
+        get = m.get
+        week = int(get("week") or 0)
+        a = get("team_a") or get("teamA")
+        b = get("team_b") or get("teamB")
+        a_id = str(a.get("team_id") or a.get("id") or "") if type(a) is dict else ""
+        b_id = str(b.get("team_id") or b.get("id") or "") if type(b) is dict else ""
+        if week and a_id and b_id:
+            append((week, a_id, b_id, 0, None, None, None))
+            append((week, b_id, a_id, 0, None, None, None))
+    return rows
+
+
+# Yahoo-shaped payload helpers
+
+
+def _flatten_yahoo_list(obj: Any) -> dict:
+    """Yahoo returns objects as lists of single-key dicts. Flatten to one dict."""
+    if type(obj) is not list:
+        return obj if type(obj) is dict else {}
+    result: dict = {}
+    # Depth-first over nested lists (rare) with an explicit stack instead of recursion
+    stack = [iter(obj)]
+    while stack:
+        for item in stack[-1]:
+            if type(item) is dict:
+                result.update(item)
+            elif type(item) is list:
+                stack.append(iter(item))
+                break
+        else:
+            stack.pop()
+    return result
+
+
+def _collection_items(current: Any) -> list:
+    # Yahoo returns collections as {count: N, "0": {...}, "1": {...}}
+    if type(current) is list:
+        return current
+    if type(current) is dict:
+        return [v for k, v in current.items() if k.isdigit() and type(v) is dict]
+    return []
+
+
+def _extract_items(data: Any, *path: str) -> list:
+    """Navigate Yahoo's fantasy_content.league.X structure and extract numeric-keyed items.
+
+    Yahoo API returns: fantasy_content.league = [league_obj, sub_resource]
+    where sub_resource contains the actual collection (teams, players, etc.)
+    """
+    current = data
+    for key in path:
+        if type(current) is dict:
+            current = current.get(key, {})
+        elif type(current) is list:
+            # Yahoo's league is a list: [league_info, sub_resource]
+            # If we're looking for a sub-resource, check index 1
+            if key == "league" and len(current) > 0:
+                # Keep it as list so next iteration can handle sub-resource
+                pass
+            elif len(current) > 1 and type(current[1]) is dict and key in current[1]:
+                # Sub-resource found at index 1
+                current = current[1].get(key, {})
+            elif len(current) == 1:
+                current = current[0]
+            else:
+                return []
+        else:
+            return []
+    return _collection_items(current)
+
+
+def _yahoo_collection(data: Any, name: str) -> list:
+    """Items of fantasy_content.league[1][name], the common shape, with direct lookups.
+
+    Anything unusual falls back to the general _extract_items walk.
+    """
+    fc = data.get("fantasy_content") if type(data) is dict else None
+    if type(fc) is not dict:
+        return _extract_items(data, "fantasy_content", "league", name)
+    league = fc.get("league", {})
+    if type(league) is dict:
+        return _collection_items(league.get(name, {}))
+    if type(league) is not list:
+        return []
+    if len(league) > 1 and type(league[1]) is dict and name in league[1]:
+        return _collection_items(league[1][name])
+    if len(league) == 1:
+        return _collection_items(league[0])
+    return []
+
+
+def _iter_yahoo_players(items: Iterable[Any]) -> Iterator[Tuple[dict, dict]]:
+    """Yield (wrapper, flattened player) for each {"player": [...]} wrapper, one at a time.
+
+    Callers consume players as they are flattened, so no flattened list is built up front.
+    """
+    for player_wrap in items:
+        player_list = player_wrap.get("player") if type(player_wrap) is dict else None
+        if type(player_list) is list:
+            yield player_wrap, _flatten_yahoo_list(player_list)
+
+
+def _yahoo_player_row(player: dict) -> Optional[Tuple[Any, ...]]:
+    """Players-table row for a flattened Yahoo player, or None without an id and name."""
+    pget = player.get
+    pid = str(pget("player_id") or pget("player_key") or "")
+    name = pget("name", {})
+    if type(name) is dict:
+        nget = name.get
+        name = nget("full") or nget("ascii_first", "") + " " + nget("ascii_last", "")
+    if not (pid and name):
+        return None
+    pos = pget("display_position") or pget("primary_position")
+    team = pget("editorial_team_abbr")
+    byes = pget("bye_weeks")
+    bye = byes.get("week") if type(byes) is dict else None
+    return (pid, str(name).strip(), str(pos) if pos else None, str(team) if team else None, int(bye) if bye else None)
+
+
+def _section(bundle: Dict[str, Any], name: str) -> Any:
+    """A bundle section, or None when it is empty or a dict without Yahoo's fantasy_content.
+
+    Every parser below yields no rows for those shapes, so they are skipped up front.
+    """
+    value = bundle.get(name)
+    if not value or (type(value) is dict and "fantasy_content" not in value):
+        return None
+    return value
+
+
 def persist_bundle(bundle: Dict[str, Any]) -> None:
     # Defensive parsing; if shapes are unexpected, skip rather than error
-    import json as _json
-
     # First, clear old roster data for the current week to ensure fresh data
     from .db import get_connection
     conn = get_connection()
@@ -141,12 +587,12 @@ def persist_bundle(bundle: Dict[str, Any]) -> None:
         league_data = bundle.get("league", {})
         current_week = None
         try:
-            if isinstance(league_data, dict):
+            if type(league_data) is dict:
                 fc = league_data.get("fantasy_content", {})
-                if isinstance(fc, dict):
+                if type(fc) is dict:
                     league_list = fc.get("league")
-                    if isinstance(league_list, list) and len(league_list) > 0:
-                        league_obj = league_list[0] if isinstance(league_list[0], dict) else {}
+                    if type(league_list) is list and len(league_list) > 0:
+                        league_obj = league_list[0] if type(league_list[0]) is dict else {}
                         current_week = league_obj.get("current_week")
         except:
             pass
@@ -161,153 +607,61 @@ def persist_bundle(bundle: Dict[str, Any]) -> None:
     finally:
         conn.close()
 
-    def _flatten_yahoo_list(obj: Any) -> dict:
-        """Yahoo returns objects as lists of single-key dicts. Flatten to one dict."""
-        if not isinstance(obj, list):
-            return obj if isinstance(obj, dict) else {}
-        result = {}
-        for item in obj:
-            if isinstance(item, dict):
-                result.update(item)
-            elif isinstance(item, list):
-                # Nested list (rare)
-                nested = _flatten_yahoo_list(item)
-                if nested:
-                    result.update(nested)
-        return result
-
-    def _extract_items(data: Any, *path: str) -> list:
-        """Navigate Yahoo's fantasy_content.league.X structure and extract numeric-keyed items.
-
-        Yahoo API returns: fantasy_content.league = [league_obj, sub_resource]
-        where sub_resource contains the actual collection (teams, players, etc.)
-        """
-        current = data
-        for key in path:
-            if isinstance(current, dict):
-                current = current.get(key, {})
-            elif isinstance(current, list):
-                # Yahoo's league is a list: [league_info, sub_resource]
-                # If we're looking for a sub-resource, check index 1
-                if key == "league" and len(current) > 0:
-                    # Keep it as list so next iteration can handle sub-resource
-                    pass
-                elif len(current) > 1 and isinstance(current[1], dict) and key in current[1]:
-                    # Sub-resource found at index 1
-                    current = current[1].get(key, {})
-                elif len(current) == 1:
-                    current = current[0]
-                else:
-                    return []
-            else:
-                return []
-
-        if isinstance(current, list):
-            return current
-        elif isinstance(current, dict):
-            # Yahoo returns collections as {count: N, "0": {...}, "1": {...}}
-            items = []
-            for k, v in current.items():
-                if k.isdigit() and isinstance(v, dict):
-                    items.append(v)
-            return items
-        return []
+    # Rows are collected per table and written with executemany in one transaction at the end
+    team_rows: List[Tuple[Any, ...]] = []
+    player_rows: List[Tuple[Any, ...]] = []
+    roster_rows: List[Tuple[Any, ...]] = []
+    matchup_rows: List[Tuple[Any, ...]] = []
+    tx_rows: List[Tuple[Any, ...]] = []
 
     # Teams
-    teams = bundle.get("teams")
-    if isinstance(teams, list):
-        for t in teams:
-            if not isinstance(t, dict):
-                continue
-            tid = str(t.get("team_id") or t.get("id") or t.get("team_key") or "")
-            name = t.get("name") or (t.get("team") or {}).get("name") or tid
-            if isinstance(name, dict):
-                name = name.get("full") or name.get("display") or tid
-            manager = (t.get("managers") or [{}])[0].get("nickname") if isinstance(t.get("managers"), list) else None
-            abbrev = (t.get("team") or {}).get("abbr") or t.get("abbrev")
-            if tid and name:
-                upsert_team(team_id=tid, name=str(name), manager=manager, abbrev=abbrev)
-    elif isinstance(teams, dict):
+    teams = _section(bundle, "teams")
+    if type(teams) is list:
+        team_rows.extend(zip(*_flatten_teams(teams)))
+    elif type(teams) is dict:
         # Parse Yahoo structure: fantasy_content.league.teams
-        for team_wrap in _extract_items(teams, "fantasy_content", "league", "teams"):
+        for team_wrap in _yahoo_collection(teams, "teams"):
             # team_wrap = {"team": [[{team_key: ...}, {team_id: ...}, ...]]}
-            team_list = team_wrap.get("team") if isinstance(team_wrap, dict) else None
-            if not isinstance(team_list, list):
+            team_list = team_wrap.get("team") if type(team_wrap) is dict else None
+            if type(team_list) is not list:
                 continue
             team = _flatten_yahoo_list(team_list)
             tid = str(team.get("team_id") or team.get("team_key") or "")
             name = team.get("name", "")
             manager = None
-            if isinstance(team.get("managers"), list) and team["managers"]:
+            if type(team.get("managers")) is list and team["managers"]:
                 mgr_wrap = team["managers"][0]
-                if isinstance(mgr_wrap, dict):
+                if type(mgr_wrap) is dict:
                     mgr = mgr_wrap.get("manager", {})
                     manager = mgr.get("nickname") or mgr.get("guid")
             abbrev = None
             if tid and name:
-                upsert_team(team_id=tid, name=str(name), manager=manager, abbrev=abbrev)
+                team_rows.append((tid, str(name), manager, abbrev))
 
     # Players
-    players = bundle.get("players")
-    if isinstance(players, list):
-        for p in players:
-            if not isinstance(p, dict):
-                continue
-            pid = str(p.get("player_id") or p.get("id") or p.get("player_key") or "")
-            name = p.get("name") or (p.get("player") or {}).get("name") or pid
-            if isinstance(name, dict):
-                name = name.get("full") or name.get("display") or pid
-            pos = p.get("position") or p.get("display_position") or (p.get("player") or {}).get("display_position")
-            team = (p.get("editorial_team_abbr") or (p.get("player") or {}).get("editorial_team_abbr"))
-            bye = p.get("bye_week") or (p.get("bye_weeks") or {}).get("week")
-            if pid and name:
-                upsert_player(player_id=pid, name=str(name), position=str(pos) if pos else None, team=str(team) if team else None, bye_week=int(bye) if bye else None)
-    elif isinstance(players, dict):
-        for player_wrap in _extract_items(players, "fantasy_content", "league", "players"):
-            player_list = player_wrap.get("player") if isinstance(player_wrap, dict) else None
-            if not isinstance(player_list, list):
-                continue
-            player = _flatten_yahoo_list(player_list)
-            pid = str(player.get("player_id") or player.get("player_key") or "")
-            name = player.get("name", {})
-            if isinstance(name, dict):
-                name = name.get("full") or name.get("ascii_first", "") + " " + name.get("ascii_last", "")
-            pos = player.get("display_position") or player.get("primary_position")
-            team = player.get("editorial_team_abbr")
-            bye = None
-            if isinstance(player.get("bye_weeks"), dict):
-                bye = player["bye_weeks"].get("week")
-            if pid and name:
-                upsert_player(player_id=pid, name=str(name).strip(), position=str(pos) if pos else None, team=str(team) if team else None, bye_week=int(bye) if bye else None)
+    players = _section(bundle, "players")
+    if type(players) is list:
+        player_rows.extend(zip(*_flatten_players(players)))
+    elif type(players) is dict:
+        for _, player in _iter_yahoo_players(_yahoo_collection(players, "players")):
+            row = _yahoo_player_row(player)
+            if row is not None:
+                player_rows.append(row)
 
     # Rosters
-    rosters = bundle.get("rosters")
-    if isinstance(rosters, list):
-        for r in rosters:
-            if not isinstance(r, dict):
-                continue
-            team_id = str(r.get("team_id") or r.get("teamKey") or r.get("team_key") or "")
-            week_val = r.get("week")
-            week = int(week_val) if isinstance(week_val, (int, str)) and str(week_val).isdigit() else 0
-            entries = r.get("entries") if isinstance(r.get("entries"), list) else []
-            for entry in entries:
-                if not isinstance(entry, dict):
-                    continue
-                pid = str(entry.get("player_id") or entry.get("id") or entry.get("player_key") or "")
-                slot = entry.get("slot") or entry.get("position")
-                status = entry.get("status")
-                if team_id and pid and week:
-                    upsert_roster(team_id=team_id, player_id=pid, week=week, status=status, slot=slot)
-    elif isinstance(rosters, dict):
+    rosters = _section(bundle, "rosters")
+    if type(rosters) is list:
+        roster_rows.extend(zip(*_flatten_rosters(rosters)))
+    elif type(rosters) is dict:
         # Rosters come from teams;out=roster, so parse teams with their rosters
-        for team_wrap in _extract_items(rosters, "fantasy_content", "league", "teams"):
-            team_list = team_wrap.get("team") if isinstance(team_wrap, dict) else None
-            if not isinstance(team_list, list):
+        for team_wrap in _yahoo_collection(rosters, "teams"):
+            team_list = team_wrap.get("team") if type(team_wrap) is dict else None
+            if type(team_list) is not list:
                 continue
             team = _flatten_yahoo_list(team_list)
             team_id = str(team.get("team_id") or team.get("team_key") or "")
             roster = team.get("roster", {})
-            if not isinstance(roster, dict):
+            if type(roster) is not dict:
                 continue
             week = roster.get("week")
             if isinstance(week, str) and week.isdigit():
@@ -317,45 +671,35 @@ def persist_bundle(bundle: Dict[str, Any]) -> None:
             # roster["0"].players contains the actual player list
             roster_wrap = roster.get("0", {})
             players_data = roster_wrap.get("players", {})
-            for player_wrap in _extract_items(players_data):
-                player_list = player_wrap.get("player") if isinstance(player_wrap, dict) else None
-                if not isinstance(player_list, list):
-                    continue
-                player = _flatten_yahoo_list(player_list)
-                pid = str(player.get("player_id") or player.get("player_key") or "")
+            for player_wrap, player in _iter_yahoo_players(_collection_items(players_data)):
+                pget = player.get
+                pid = str(pget("player_id") or pget("player_key") or "")
 
                 # Also upsert player details from roster data
-                name = player.get("name", {})
-                if isinstance(name, dict):
-                    name = name.get("full") or name.get("ascii_first", "") + " " + name.get("ascii_last", "")
-                pos = player.get("display_position") or player.get("primary_position")
-                team = player.get("editorial_team_abbr")
-                bye = None
-                if isinstance(player.get("bye_weeks"), dict):
-                    bye = player["bye_weeks"].get("week")
-                if pid and name:
-                    upsert_player(player_id=pid, name=str(name).strip(), position=str(pos) if pos else None, team=str(team) if team else None, bye_week=int(bye) if bye else None)
+                row = _yahoo_player_row(player)
+                if row is not None:
+                    player_rows.append(row)
 
                 # Selected position info
-                selected_list = player_wrap.get("selected_position") if isinstance(player_wrap, dict) else None
-                if isinstance(selected_list, list):
+                selected_list = player_wrap.get("selected_position")
+                if type(selected_list) is list:
                     selected = _flatten_yahoo_list(selected_list)
-                elif isinstance(selected_list, dict):
+                elif type(selected_list) is dict:
                     selected = selected_list
                 else:
                     selected = {}
-                slot = selected.get("position") if isinstance(selected, dict) else None
-                status = player.get("status")
+                slot = selected.get("position") if type(selected) is dict else None
+                status = pget("status")
                 if team_id and pid and week:
-                    upsert_roster(team_id=team_id, player_id=pid, week=week, status=status, slot=slot)
+                    roster_rows.append((team_id, pid, week, status, slot))
 
     # My Roster (with actual lineup positions)
-    my_roster = bundle.get("my_roster")
-    if isinstance(my_roster, dict):
+    my_roster = _section(bundle, "my_roster")
+    if type(my_roster) is dict:
         try:
             fc = my_roster.get("fantasy_content", {})
             team_data = fc.get("team")
-            if isinstance(team_data, list):
+            if type(team_data) is list:
                 team_obj = _flatten_yahoo_list(team_data)
                 team_id = str(team_obj.get("team_id") or team_obj.get("team_key") or "")
                 roster_data = team_obj.get("roster", {})
@@ -368,55 +712,45 @@ def persist_bundle(bundle: Dict[str, Any]) -> None:
                 roster_0 = roster_data.get("0", {})
                 players_data = roster_0.get("players", {})
 
-                for player_wrap in _extract_items(players_data):
-                    player_list = player_wrap.get("player") if isinstance(player_wrap, dict) else None
-                    if not isinstance(player_list, list):
+                for player_wrap in _collection_items(players_data):
+                    player_list = player_wrap.get("player") if type(player_wrap) is dict else None
+                    if type(player_list) is not list:
                         continue
 
                     # Yahoo's structure: player = [[{player details...}], {selected_position: ...}, {...}]
                     # The first element is a list of dicts with player data
                     # The second element (if present) contains selected_position
-                    player = _flatten_yahoo_list(player_list[0] if len(player_list) > 0 and isinstance(player_list[0], list) else player_list)
+                    player = _flatten_yahoo_list(player_list[0] if len(player_list) > 0 and type(player_list[0]) is list else player_list)
                     pid = str(player.get("player_id") or player.get("player_key") or "")
 
                     # Extract selected_position from index 1 of player_list
                     selected = {}
-                    if len(player_list) > 1 and isinstance(player_list[1], dict):
+                    if len(player_list) > 1 and type(player_list[1]) is dict:
                         selected_wrap = player_list[1]
                         if "selected_position" in selected_wrap:
                             selected_list = selected_wrap["selected_position"]
-                            if isinstance(selected_list, list):
+                            if type(selected_list) is list:
                                 selected = _flatten_yahoo_list(selected_list)
-                            elif isinstance(selected_list, dict):
+                            elif type(selected_list) is dict:
                                 selected = selected_list
 
-                    slot = selected.get("position") if isinstance(selected, dict) else None
+                    slot = selected.get("position") if type(selected) is dict else None
                     status = player.get("status")
 
                     if team_id and pid and week and slot:
                         # UPDATE the roster entry with the real lineup slot
-                        upsert_roster(team_id=team_id, player_id=pid, week=week, status=status, slot=slot)
+                        roster_rows.append((team_id, pid, week, status, slot))
         except Exception as e:
             print(f"[INGEST] Warning: Could not parse my_roster: {e}")
 
     # Matchups
-    matchups_raw = bundle.get("matchups")
-    if isinstance(matchups_raw, list):
-        for m in matchups_raw:
-            if not isinstance(m, dict):
-                continue
-            week = int(m.get("week") or 0)
-            a = m.get("team_a") or m.get("teamA") or {}
-            b = m.get("team_b") or m.get("teamB") or {}
-            a_id = str(a.get("team_id") or a.get("id") or "") if isinstance(a, dict) else ""
-            b_id = str(b.get("team_id") or b.get("id") or "") if isinstance(b, dict) else ""
-            if week and a_id and b_id:
-                upsert_matchup(week=week, team_id=a_id, opponent_id=b_id, projected=None, actual=None, result=None)
-                upsert_matchup(week=week, team_id=b_id, opponent_id=a_id, projected=None, actual=None, result=None)
-    elif isinstance(matchups_raw, dict):
+    matchups_raw = _section(bundle, "matchups")
+    if type(matchups_raw) is list:
+        matchup_rows.extend(_flatten_matchups(matchups_raw))
+    elif type(matchups_raw) is dict:
         fc = matchups_raw.get("fantasy_content", {})
         league = fc.get("league", [])
-        if not isinstance(league, list) or len(league) < 2:
+        if type(league) is not list or len(league) < 2:
             pass
         else:
             scoreboard = league[1].get("scoreboard", {})
@@ -428,45 +762,77 @@ def persist_bundle(bundle: Dict[str, Any]) -> None:
             # scoreboard["0"].matchups contains the actual matchups
             sb_wrap = scoreboard.get("0", {})
             matchups_dict = sb_wrap.get("matchups", {})
-            for matchup_wrap in _extract_items(matchups_dict):
-                matchup_data = matchup_wrap.get("matchup", {}) if isinstance(matchup_wrap, dict) else {}
-                if not isinstance(matchup_data, dict):
+            for matchup_wrap in _collection_items(matchups_dict):
+                matchup_data = matchup_wrap.get("matchup", {}) if type(matchup_wrap) is dict else {}
+                if type(matchup_data) is not dict:
                     continue
                 # matchup_data["0"].teams contains the team list
                 teams_wrap = matchup_data.get("0", {})
                 teams = teams_wrap.get("teams", {})
-                team_list = _extract_items(teams)
+                team_list = _collection_items(teams)
                 if len(team_list) >= 2:
-                    team_a_list = team_list[0].get("team") if isinstance(team_list[0], dict) else None
-                    team_b_list = team_list[1].get("team") if isinstance(team_list[1], dict) else None
-                    if isinstance(team_a_list, list) and isinstance(team_b_list, list):
+                    team_a_list = team_list[0].get("team") if type(team_list[0]) is dict else None
+                    team_b_list = team_list[1].get("team") if type(team_list[1]) is dict else None
+                    if type(team_a_list) is list and type(team_b_list) is list:
                         team_a = _flatten_yahoo_list(team_a_list)
                         team_b = _flatten_yahoo_list(team_b_list)
                         a_id = str(team_a.get("team_id") or team_a.get("team_key") or "")
                         b_id = str(team_b.get("team_id") or team_b.get("team_key") or "")
                         if week and a_id and b_id:
-                            upsert_matchup(week=week, team_id=a_id, opponent_id=b_id, projected=None, actual=None, result=None)
-                            upsert_matchup(week=week, team_id=b_id, opponent_id=a_id, projected=None, actual=None, result=None)
+                            matchup_rows.append((week, a_id, b_id, 0, None, None, None))
+                            matchup_rows.append((week, b_id, a_id, 0, None, None, None))
 
     # Transactions
-    txs = bundle.get("transactions")
-    if isinstance(txs, list):
+    # Each row stores its own transaction re-serialized with orjson. Slicing the original
+    # response bytes would need a streaming parser, and the Yahoo shape is flattened before
+    # storage anyway, so there is no raw slice to pass through.
+    txs = _section(bundle, "transactions")
+    dumps_str = _json.dumps_str
+    if type(txs) is list:
         for tx in txs:
-            if not isinstance(tx, dict):
+            if type(tx) is not dict:
                 continue
-            kind = str(tx.get("type") or tx.get("kind") or "")
-            team_id = str(tx.get("team_id") or tx.get("teamKey") or "")
-            insert_transaction_raw(kind=kind or None, team_id=team_id or None, raw=_json.dumps(tx))
-    elif isinstance(txs, dict):
-        for tx_wrap in _extract_items(txs, "fantasy_content", "league", "transactions"):
-            tx_list = tx_wrap.get("transaction") if isinstance(tx_wrap, dict) else None
-            if not isinstance(tx_list, list):
+            get = tx.get
+            kind = str(get("type") or get("kind") or "")
+            team_id = str(get("team_id") or get("teamKey") or "")
+            tx_rows.append((kind or None, team_id or None, dumps_str(tx)))
+    elif type(txs) is dict:
+        for tx_wrap in _yahoo_collection(txs, "transactions"):
+            tx_list = tx_wrap.get("transaction") if type(tx_wrap) is dict else None
+            if type(tx_list) is not list:
                 continue
             tx = _flatten_yahoo_list(tx_list)
             kind = str(tx.get("type") or "")
             team_id = None
             # Transactions can have players with source/destination teams
-            insert_transaction_raw(kind=kind or None, team_id=team_id, raw=_json.dumps(tx))
+            tx_rows.append((kind or None, team_id, dumps_str(tx)))
+
+    _write_bundle_rows(team_rows, player_rows, roster_rows, matchup_rows, tx_rows)
+
+
+def _write_bundle_rows(
+    team_rows: List[Tuple[Any, ...]],
+    player_rows: List[Tuple[Any, ...]],
+    roster_rows: List[Tuple[Any, ...]],
+    matchup_rows: List[Tuple[Any, ...]],
+    tx_rows: List[Tuple[Any, ...]],
+) -> None:
+    from .db import get_connection
+
+    conn = get_connection()
+    try:
+        # Ingest is re-runnable from the response cache, so skip fsync for this bulk write.
+        # journal_mode is left alone: it is database-wide and the app runs in WAL.
+        conn.execute("PRAGMA synchronous=OFF")
+        with conn:
+            upsert_teams_many(team_rows, connection=conn)
+            upsert_players_many(player_rows, connection=conn)
+            # Order matters within rosters: my_roster rows must land after the league-wide ones
+            upsert_rosters_many(roster_rows, connection=conn)
+            upsert_matchups_many(matchup_rows, connection=conn)
+            insert_transactions_raw_many(tx_rows, connection=conn)
+    finally:
+        conn.close()
 
 
 __all__ = ["fetch_league_bundle", "ingest"]
@@ -14,6 +14,10 @@ class ProposedSwap:
     delta_points: float
 
 
+# Injury designations that keep a player out of a starting pick
+_BENCH_INJURIES = frozenset({"D", "OUT"})
+
+
 def optimize_lineup(
     *,
     settings: LeagueSettings,
@@ -24,15 +28,29 @@ def optimize_lineup(
     # Simple heuristic: for each slot capacity, ensure highest projected non-bye, non-D/Q over injured
     swaps: List[ProposedSwap] = []
 
-    # Build pool by slot
-    by_slot: Dict[str, List[Dict]] = {}
-    for p in candidates:
-        for slot in _eligible_slots(p["position"], settings):
-            by_slot.setdefault(slot, []).append(p)
-
-    # Apply filters
-    for slot, players in by_slot.items():
-        players.sort(key=lambda x: float(x.get("projected", 0.0)), reverse=True)
+    # id -> candidate; the first entry wins for duplicate ids
+    cand_by_id: Dict[str, Dict] = {}
+    for c in candidates:
+        cand_by_id.setdefault(c["id"], c)
+
+    # Build pool by slot: one stable sort by projection, then bucket, so every slot's pool
+    # comes out already ordered (same order as sorting each pool separately). Pools hold
+    # (id, playable) pairs: bye-week players never start, and the injury check runs once
+    # per player instead of once per eligible slot.
+    ranked = sorted(candidates, key=lambda x: float(x.get("projected", 0.0)), reverse=True)
+    by_slot: Dict[str, List[Tuple[str, bool]]] = {}
+    # Eligible slots depend only on the position string; resolve each distinct one once
+    slots_by_position: Dict[str, Tuple[str, ...]] = {}
+    for p in ranked:
+        if p.get("is_bye"):
+            continue
+        position = p["position"]
+        slots = slots_by_position.get(position)
+        if slots is None:
+            slots = slots_by_position[position] = tuple(_eligible_slots(position, settings))
+        entry = (p["id"], str(p.get("injury", "")).upper() not in _BENCH_INJURIES)
+        for slot in slots:
+            by_slot.setdefault(slot, []).append(entry)
 
     # Enforce starters per positional limits
     limits = settings.positional_limits
@@ -48,39 +66,32 @@ def optimize_lineup(
     for slot, required in targets.items():
         if required <= 0:
             continue
-        pool = [p for p in by_slot.get(slot, []) if not p.get("is_bye")]
-        # avoid Q/D unless small delta
-        def ok(p):
-            injury = str(p.get("injury", "")).upper()
-            return injury not in {"D", "OUT"}
-
-        chosen = []
-        for p in pool:
-            if len(chosen) >= required:
+        # Take the top projections, skipping D/OUT players unless nobody is chosen yet
+        chosen_ids = set()
+        taken = 0
+        for pid, playable in by_slot.get(slot, ()):
+            if taken >= required:
                 break
-            if ok(p) or not chosen:
-                chosen.append(p)
+            if playable or not taken:
+                chosen_ids.add(pid)
+                taken += 1
 
         # Determine swaps vs current starters
         current = set(current_starters.get(slot, []))
-        chosen_ids = {p["id"] for p in chosen}
         to_add = chosen_ids - current
         to_remove = current - chosen_ids
+        # The lowest-projected known current starter is the swap-out for every add in this
+        # slot; ties go to the first one seen, as before
+        known = [cid for cid in current if cand_by_id.get(cid)]
+        rem_id = min(known, key=lambda cid: cand_by_id[cid].get("projected", 0), default=None)
+        rem_proj = cand_by_id[rem_id].get("projected", 0) if rem_id is not None else 1e9
         for add_id in to_add:
-            add = _find(candidates, add_id)
-            # pick a remove with lowest projection
-            rem_id = None
-            rem_proj = 1e9
-            for cid in current:
-                cp = _find(candidates, cid)
-                if cp and cp.get("projected", 0) < rem_proj:
-                    rem_proj = cp.get("projected", 0)
-                    rem_id = cid
+            add = cand_by_id.get(add_id)
             if add and rem_id:
                 add_proj = float(add.get("projected", 0))
                 delta = add_proj - float(rem_proj if rem_proj != 1e9 else 0)
                 # never bench tier-1 unless delta>N
-                if _is_tier1(rem_id, candidates) and delta < delta_threshold_for_tier1:
+                if _is_tier1(cand_by_id[rem_id]) and delta < delta_threshold_for_tier1:
                     continue
                 reason = f"{slot}: +{add_id} over {rem_id} (Δ {delta:.1f})"
                 swaps.append(ProposedSwap(out_player_id=rem_id, in_player_id=add_id, reason=reason, delta_points=delta))
@@ -99,16 +110,8 @@ def _eligible_slots(position: str, settings: LeagueSettings) -> List[str]:
     return slots
 
 
-def _find(candidates: List[Dict], pid: str) -> Dict:
-    for c in candidates:
-        if c["id"] == pid:
-            return c
-    return {}
-
-
-def _is_tier1(pid: str, candidates: List[Dict]) -> bool:
-    c = _find(candidates, pid)
-    return str(c.get("tier", "")).lower() == "tier-1"
+def _is_tier1(candidate: Dict) -> bool:
+    return str(candidate.get("tier", "")).lower() == "tier-1"
 
 
 __all__ = ["optimize_lineup", "ProposedSwap"]
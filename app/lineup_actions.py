@@ -10,10 +10,20 @@ from typing import List, Dict, Optional
 from .lineup_enhanced import optimize_lineup_enhanced, SitStartRecommendation
 from .models import LeagueSettings
 from .inbox import notify
-from .db import get_connection
+from .db import get_reader
 from .config import get_settings
 
 
+_ROSTER_COLUMNS = ("id", "name", "position", "team", "slot", "status")
+_ROSTER_SQL = """
+    SELECT p.id, p.name, p.position, p.team, r.slot, r.status
+    FROM rosters r
+    JOIN players p ON r.player_id = p.id
+    WHERE r.team_id = ? AND r.week = ?
+    ORDER BY p.position, p.name
+"""
+
+
 def get_roster_for_optimization(week: int) -> List[Dict]:
     """Fetch current roster from database for optimization."""
     cfg = get_settings()
@@ -22,37 +32,9 @@ def get_roster_for_optimization(week: int) -> List[Dict]:
     if not my_team_id:
         return []
     
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT 
-                p.id,
-                p.name,
-                p.position,
-                p.team,
-                r.slot,
-                r.status
-            FROM rosters r
-            JOIN players p ON r.player_id = p.id
-            WHERE r.team_id = ? AND r.week = ?
-            ORDER BY p.position, p.name
-        """, (my_team_id, week))
-        
-        roster = []
-        for row in cur.fetchall():
-            roster.append({
-                "id": row[0],
-                "name": row[1],
-                "position": row[2],
-                "team": row[3],
-                "slot": row[4],
-                "status": row[5],
-            })
-        
-        return roster
-    finally:
-        conn.close()
+    with get_reader() as conn:
+        cur = conn.execute(_ROSTER_SQL, (my_team_id, week))
+        return [dict(zip(_ROSTER_COLUMNS, row)) for row in cur.fetchall()]
 
 
 def format_recommendations_for_inbox(
@@ -155,14 +137,11 @@ def optimize_and_post_to_inbox(
 
 def get_current_week() -> int:
     """Get current NFL week from database."""
-    conn = get_connection()
-    try:
+    with get_reader() as conn:
         cur = conn.cursor()
         cur.execute("SELECT MAX(week) FROM matchups")
         result = cur.fetchone()
         return result[0] if result and result[0] else 1
-    finally:
-        conn.close()
 
 
 def run_lineup_optimizer_action(settings: LeagueSettings) -> Optional[int]:
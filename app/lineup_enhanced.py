@@ -10,18 +10,24 @@ Generates intelligent sit/start recommendations by analyzing:
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+import heapq
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from itertools import islice
+from operator import attrgetter, itemgetter
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 
 from .models import LeagueSettings
-from .projections import get_projections
-from .news import fetch_all_news
+from .projections import PlayerProjection, get_projections, points_attr_for
+from .news import NewsItem, fetch_all_news
 from .weather import WeatherAPI, WeatherCondition
 from .db import get_connection
+from .utils import TTLCache
 
 
-@dataclass
+@dataclass(slots=True)
 class EnhancedPlayer:
     """Player with all decision-making data."""
     id: str
@@ -39,7 +45,7 @@ class EnhancedPlayer:
     tier: str = "tier-3"  # tier-1, tier-2, tier-3
 
     # News factors
-    recent_news: List[str] = None  # Headlines about this player
+    recent_news: List[str] = field(default_factory=list)  # Headlines about this player
     news_sentiment: str = "neutral"  # positive, neutral, negative
 
     # Weather
@@ -50,16 +56,12 @@ class EnhancedPlayer:
     current_slot: Optional[str] = None  # QB, RB, WR, BN, etc.
     is_starter: bool = False
 
-    def __post_init__(self):
-        if self.recent_news is None:
-            self.recent_news = []
-
     def get_final_projection(self) -> float:
         """Get projection after all adjustments."""
         return max(0.0, self.adjusted_projection + self.weather_adjustment)
 
 
-@dataclass
+@dataclass(slots=True)
 class SitStartRecommendation:
     """Detailed sit/start recommendation with full rationale."""
     action: str  # "start" or "bench"
@@ -95,14 +97,69 @@ class SitStartRecommendation:
         return "\n".join(lines)
 
 
+# Sentiment keywords, matched as substrings (so "out" also hits "without", as it always has);
+# one compiled alternation scans the text once instead of once per keyword
+_NEGATIVE_NEWS = re.compile("out|injured|doubtful|suspended")
+_POSITIVE_NEWS = re.compile("returns|cleared|breakout|starting")
+
+
+# Projection/news indexes reused across optimize calls (e.g. one per team) for a few minutes.
+# Empty results are not cached, so a failed fetch is retried on the next call.
+_CONTEXT_CACHE = TTLCache(maxsize=8, ttl=300)
+
+
+def _projection_index(week: int) -> Dict[str, PlayerProjection]:
+    """Lowercased player name -> projection for the week; first listing wins."""
+    key = ("projections", week)
+    index = _CONTEXT_CACHE.get(key)
+    if index is None:
+        index = {}
+        for proj in get_projections(week):
+            index.setdefault(proj.player_name.lower(), proj)
+        if index:
+            _CONTEXT_CACHE.set(key, index)
+    return index
+
+
+def _news_index() -> Dict[str, List[Tuple[int, NewsItem]]]:
+    """Lowercased player_mentioned -> [(feed position, item)], each list newest first."""
+    index = _CONTEXT_CACHE.get("news")
+    if index is None:
+        index = {}
+        for position, n in enumerate(fetch_all_news()):
+            if n.player_mentioned:
+                index.setdefault(n.player_mentioned.lower(), []).append((position, n))
+        if index:
+            _CONTEXT_CACHE.set("news", index)
+    return index
+
+
+def _player_news(news_index: Dict[str, List[Tuple[int, NewsItem]]], name_lower: str, limit: int) -> List[NewsItem]:
+    """Latest ``limit`` items whose mention contains the name, in feed (newest-first) order."""
+    groups = [items for mentioned, items in news_index.items() if name_lower in mentioned]
+    if len(groups) == 1:
+        return [n for _, n in groups[0][:limit]]
+    # Several mentions match (e.g. "Josh Allen" in "josh allen (buf)"): merge back by feed position
+    return [n for _, n in islice(heapq.merge(*groups, key=itemgetter(0)), limit)]
+
+
 def fetch_player_context(
     player_id: str,
     player_name: str,
     player_team: str,
     week: int,
-    settings: LeagueSettings
+    settings: LeagueSettings,
+    *,
+    projections_by_name: Optional[Dict[str, PlayerProjection]] = None,
+    news_index: Optional[Dict[str, List[Tuple[int, NewsItem]]]] = None,
+    projection_attr: Optional[str] = None,
 ) -> Dict:
-    """Fetch all context for a player: projections, news, weather."""
+    """Fetch all context for a player: projections, news, weather.
+
+    Pass ``projections_by_name``/``news_index``/``projection_attr`` (see
+    build_enhanced_players) to reuse one fetch and scoring lookup across a roster;
+    otherwise they are worked out for this call.
+    """
     context = {
         "projection": 0.0,
         "news": [],
@@ -110,41 +167,35 @@ def fetch_player_context(
         "weather": None,
         "weather_adjustment": 0.0,
     }
+    name_lower = player_name.lower()
 
     # Get projections
     try:
-        projections = get_projections(week)
-        player_proj = next(
-            (p for p in projections if p.player_name.lower() == player_name.lower()),
-            None
-        )
+        if projections_by_name is None:
+            projections_by_name = _projection_index(week)
+        player_proj = projections_by_name.get(name_lower)
         if player_proj:
             # Use appropriate scoring format
-            if settings.scoring.ppr == 1.0:
-                context["projection"] = player_proj.fantasy_points_ppr or 0.0
-            elif settings.scoring.ppr == 0.5:
-                context["projection"] = player_proj.fantasy_points_half_ppr or 0.0
-            else:
-                context["projection"] = player_proj.fantasy_points_standard or 0.0
+            if projection_attr is None:
+                projection_attr = points_attr_for(settings.scoring.ppr)
+            context["projection"] = getattr(player_proj, projection_attr) or 0.0
     except Exception as e:
         print(f"[LINEUP] Could not fetch projection for {player_name}: {e}")
 
     # Get news
     try:
-        all_news = fetch_all_news()
-        player_news = [
-            n for n in all_news
-            if n.player_mentioned and player_name.lower() in n.player_mentioned.lower()
-        ][:3]  # Latest 3
+        if news_index is None:
+            news_index = _news_index()
+        player_news = _player_news(news_index, name_lower, 3)  # Latest 3
 
         context["news"] = [n.title for n in player_news]
 
         # Sentiment analysis (basic keyword matching)
         if player_news:
             news_text = " ".join([n.title + " " + n.description for n in player_news]).lower()
-            if any(word in news_text for word in ["out", "injured", "doubtful", "suspended"]):
+            if _NEGATIVE_NEWS.search(news_text):
                 context["news_sentiment"] = "negative"
-            elif any(word in news_text for word in ["returns", "cleared", "breakout", "starting"]):
+            elif _POSITIVE_NEWS.search(news_text):
                 context["news_sentiment"] = "positive"
     except Exception as e:
         print(f"[LINEUP] Could not fetch news for {player_name}: {e}")
@@ -157,6 +208,16 @@ def fetch_player_context(
     return context
 
 
+# Projection multipliers by injury designation and news sentiment; anything else is 1.0
+_INJURY_MULTIPLIERS = {
+    "OUT": 0.0,
+    "SUSPENDED": 0.0,
+    "D": 0.3,  # Doubtful = 30% chance
+    "Q": 0.85,  # Questionable = slight downgrade
+}
+_NEWS_MULTIPLIERS = {"negative": 0.8, "positive": 1.1}
+
+
 def build_enhanced_players(
     players: List[Dict],
     week: int,
@@ -165,6 +226,19 @@ def build_enhanced_players(
     """Build EnhancedPlayer objects with all context."""
     enhanced = []
 
+    # Fetch projections and news once for the whole roster rather than once per player
+    try:
+        projections_by_name = _projection_index(week)
+    except Exception as e:
+        print(f"[LINEUP] Could not fetch projections for week {week}: {e}")
+        projections_by_name = {}
+    try:
+        news_index = _news_index()
+    except Exception as e:
+        print(f"[LINEUP] Could not fetch news: {e}")
+        news_index = {}
+    projection_attr = points_attr_for(settings.scoring.ppr)
+
     for p in players:
         # Fetch context
         context = fetch_player_context(
@@ -172,7 +246,10 @@ def build_enhanced_players(
             p.get("name", ""),
             p.get("team", ""),
             week,
-            settings
+            settings,
+            projections_by_name=projections_by_name,
+            news_index=news_index,
+            projection_attr=projection_attr,
         )
 
         # Build enhanced player
@@ -182,19 +259,14 @@ def build_enhanced_players(
         # Adjust for injury
         injury = p.get("injury") or p.get("status")
         if injury:
-            injury_upper = str(injury).upper()
-            if injury_upper in ["OUT", "SUSPENDED"]:
-                adjusted_proj = 0.0
-            elif injury_upper == "D":
-                adjusted_proj *= 0.3  # Doubtful = 30% chance
-            elif injury_upper == "Q":
-                adjusted_proj *= 0.85  # Questionable = slight downgrade
+            multiplier = _INJURY_MULTIPLIERS.get(str(injury).upper())
+            if multiplier is not None:
+                adjusted_proj = adjusted_proj * multiplier if multiplier else 0.0
 
         # Adjust for news sentiment
-        if context["news_sentiment"] == "negative":
-            adjusted_proj *= 0.8
-        elif context["news_sentiment"] == "positive":
-            adjusted_proj *= 1.1
+        multiplier = _NEWS_MULTIPLIERS.get(context["news_sentiment"])
+        if multiplier is not None:
+            adjusted_proj *= multiplier
 
         enhanced_player = EnhancedPlayer(
             id=p.get("id", ""),
@@ -219,83 +291,114 @@ def build_enhanced_players(
     return enhanced
 
 
+def _bench_factors(player: EnhancedPlayer) -> Tuple[List[str], List[str], bool]:
+    """(news reasons, weather reasons, positive news) for a bench player in any pairing."""
+    positive = player.news_sentiment == "positive"
+    news = [f"Positive news: {player.recent_news[0] if player.recent_news else 'opportunity increase'}"] if positive else []
+    weather = []
+    if player.weather and player.weather.weather_impact == "good":
+        weather.append(f"Good weather conditions for {player.name}")
+    return news, weather, positive
+
+
+def _starter_factors(player: EnhancedPlayer) -> Tuple[List[str], List[str], bool]:
+    """(news and injury reasons, weather reasons, injury risk) for a starter in any pairing."""
+    news = []
+    if player.news_sentiment == "negative":
+        news.append(f"{player.name} has concerning news")
+    injured = bool(player.injury_status and player.injury_status.upper() in ["Q", "D"])
+    if injured:
+        news.append(f"{player.name} injury risk ({player.injury_status})")
+    weather = []
+    if player.weather and player.weather.weather_impact in ["bad", "severe"]:
+        weather.append(f"Poor weather for {player.name}: {player.weather.get_impact_description()}")
+    return news, weather, injured
+
+
 def generate_sit_start_recommendations(
     *,
     settings: LeagueSettings,
     players: List[EnhancedPlayer],
     week: int,
-    min_confidence: float = 60.0
+    min_confidence: float = 60.0,
+    top_n: Optional[int] = None,
 ) -> List[SitStartRecommendation]:
-    """Generate sit/start recommendations with detailed rationale."""
+    """Generate sit/start recommendations with detailed rationale.
+
+    At most one recommendation per bench player, and no starter is benched twice.
+    With ``top_n``, only the best ``top_n`` recommendations are returned (same order as
+    the full list, without sorting all of it).
+    """
     recommendations = []
 
-    # Group by position
-    by_position: Dict[str, List[EnhancedPlayer]] = {}
+    # Group by position into (starters, bench) in one pass, skipping byes; positions keep
+    # first-seen order so tied recommendations sort as before
+    by_position: Dict[str, Tuple[List[EnhancedPlayer], List[EnhancedPlayer]]] = {}
     for p in players:
-        by_position.setdefault(p.position, []).append(p)
+        group = by_position.setdefault(p.position, ([], []))
+        if not p.is_bye:
+            group[0 if p.is_starter else 1].append(p)
 
     # For each position, compare starters vs bench
-    for position, pos_players in by_position.items():
-        starters = [p for p in pos_players if p.is_starter and not p.is_bye]
-        bench = [p for p in pos_players if not p.is_starter and not p.is_bye]
-
+    for position, (starters, bench) in by_position.items():
         if not starters or not bench:
             continue
 
-        # Sort by projection
-        starters.sort(key=lambda x: x.get_final_projection(), reverse=True)
-        bench.sort(key=lambda x: x.get_final_projection(), reverse=True)
-
-        # Find swaps where bench > starter
-        for bench_player in bench:
-            bench_proj = bench_player.get_final_projection()
-
-            for starter in starters:
-                starter_proj = starter.get_final_projection()
+        # Sort by projection, computing each player's final projection once
+        ranked_starters = sorted(
+            ((s.get_final_projection(), s) for s in starters), key=itemgetter(0), reverse=True
+        )
+        ranked_bench = sorted(
+            ((b.get_final_projection(), b) for b in bench), key=itemgetter(0), reverse=True
+        )
+        # Negated starter projections ascend, so bisect finds where the beatable starters begin
+        neg_starter_projs = [-proj for proj, _ in ranked_starters]
+        # Pair-independent rationale, worked out once per starter rather than once per pair
+        starter_factors = [_starter_factors(starter) for _, starter in ranked_starters]
+
+        # Greedy matching, weakest bench player first: each bench player is paired with the
+        # weakest starter it beats that is not already being benched, so every swap is a
+        # distinct one-for-one move and stronger bench players are left the stronger
+        # starters. Only starters below the bench projection are tried.
+        benched = [False] * len(ranked_starters)
+        for bench_proj, bench_player in reversed(ranked_bench):
+            first_beaten = bisect_right(neg_starter_projs, -bench_proj)
+            bench_news, bench_weather, bench_positive = _bench_factors(bench_player)
+
+            for i in range(len(ranked_starters) - 1, first_beaten - 1, -1):
+                if benched[i]:
+                    continue
+                starter_proj, starter = ranked_starters[i]
+                starter_news, starter_weather, starter_injured = starter_factors[i]
                 delta = bench_proj - starter_proj
 
-                if delta <= 0:
-                    continue  # Bench player not better
-
-                # Build rationale
-                reasons = []
-                warnings = []
-
-                # Projection delta
-                reasons.append(f"{bench_player.name} projected {bench_proj:.1f} pts vs {starter.name} {starter_proj:.1f} pts")
-
-                # News
-                if bench_player.news_sentiment == "positive":
-                    reasons.append(f"Positive news: {bench_player.recent_news[0] if bench_player.recent_news else 'opportunity increase'}")
-                if starter.news_sentiment == "negative":
-                    reasons.append(f"{starter.name} has concerning news")
-
-                # Injury
-                if starter.injury_status and starter.injury_status.upper() in ["Q", "D"]:
-                    reasons.append(f"{starter.name} injury risk ({starter.injury_status})")
-
-                # Weather
-                if bench_player.weather and bench_player.weather.weather_impact == "good":
-                    reasons.append(f"Good weather conditions for {bench_player.name}")
-                if starter.weather and starter.weather.weather_impact in ["bad", "severe"]:
-                    reasons.append(f"Poor weather for {starter.name}: {starter.weather.get_impact_description()}")
-
-                # Tier protection
-                if starter.tier == "tier-1" and delta < 5.0:
-                    warnings.append(f"{starter.name} is tier-1, only sit if you're confident")
-
-                # Confidence score
+                # Confidence score, before any rationale text is built
                 confidence = min(100, 50 + (delta * 5))  # Base 50%, +5 per point delta
-                if len(reasons) >= 3:
+                reason_count = 1 + len(bench_news) + len(starter_news) + len(bench_weather) + len(starter_weather)
+                if reason_count >= 3:
                     confidence += 10
-                if bench_player.news_sentiment == "positive":
+                if bench_positive:
                     confidence += 10
-                if starter.injury_status and starter.injury_status.upper() in ["Q", "D"]:
+                if starter_injured:
                     confidence += 15
 
                 if confidence < min_confidence:
                     continue
 
+                # Build rationale: projection delta, news and injury, then weather
+                reasons = [
+                    f"{bench_player.name} projected {bench_proj:.1f} pts vs {starter.name} {starter_proj:.1f} pts",
+                    *bench_news,
+                    *starter_news,
+                    *bench_weather,
+                    *starter_weather,
+                ]
+                warnings = []
+
+                # Tier protection
+                if starter.tier == "tier-1" and delta < 5.0:
+                    warnings.append(f"{starter.name} is tier-1, only sit if you're confident")
+
                 recommendation = SitStartRecommendation(
                     action="start",
                     player_in=bench_player,
@@ -307,9 +410,14 @@ def generate_sit_start_recommendations(
                 )
 
                 recommendations.append(recommendation)
+                benched[i] = True
+                break
 
     # Sort by confidence and projection delta
-    recommendations.sort(key=lambda r: (r.confidence, r.projection_delta), reverse=True)
+    rank = attrgetter("confidence", "projection_delta")
+    if top_n is not None:
+        return heapq.nlargest(top_n, recommendations, key=rank)
+    recommendations.sort(key=rank, reverse=True)
 
     return recommendations
 
@@ -319,7 +427,8 @@ def optimize_lineup_enhanced(
     settings: LeagueSettings,
     roster_players: List[Dict],  # From database: id, name, position, team, slot, status
     week: int,
-    min_confidence: float = 60.0
+    min_confidence: float = 60.0,
+    top_n: Optional[int] = None,
 ) -> List[SitStartRecommendation]:
     """
     Main entry point for enhanced lineup optimization.
@@ -340,7 +449,8 @@ def optimize_lineup_enhanced(
         settings=settings,
         players=enhanced_players,
         week=week,
-        min_confidence=min_confidence
+        min_confidence=min_confidence,
+        top_n=top_n,
     )
 
     return recommendations
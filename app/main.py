@@ -1,22 +1,31 @@
+import hashlib
+import json
+import logging
 import os
+from functools import lru_cache
 from typing import Optional
 
+import anyio
+
 from fastapi import FastAPI, Request, HTTPException, status, Form
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from contextlib import asynccontextmanager
-import json as _json
 
-from .db import get_connection, migrate, seed_example_data_if_empty
+from . import _json
+
+from .db import get_reader, migrate, seed_example_data_if_empty
 from .store import migrate as store_migrate
-from .inbox import list_notifications as inbox_list, get_notification as inbox_get, mark_read as inbox_mark_read, unread_count as inbox_unread, latest_settings_payload, notify, mark_all_read as inbox_mark_all
+from .inbox import get_notification as inbox_get, get_inbox_detail as inbox_detail, mark_read as inbox_mark_read, unread_count as inbox_unread, latest_settings_payload, get_home_payload, notify, mark_all_read as inbox_mark_all
 from .brief import post_gm_brief
+from .prefetch import prefetch_gm_context
 from .waivers import recommend_waivers, free_agents_from_yahoo
 from .models import LeagueSettings
-from .yahoo_client import YahooClient
+from .yahoo_client import YahooClient, add_transaction_xml
 from .config import get_settings
-from .ingest import fetch_league_bundle, persist_bundle
-from .store import record_snapshot, list_recommendations, set_recommendation_status, count_pending_recommendations, get_recommendation, insert_transaction_raw
+from .ingest import bundle_endpoints, fetch_league_bundle, persist_bundle
+from .store import record_snapshots_many, list_recommendations, set_recommendation_status, count_pending_recommendations, get_recommendation, insert_transaction_raw
 from .config import get_settings
 from .utils import normalize_league_key
 from .news import fetch_all_news
@@ -26,6 +35,14 @@ from .scouting import post_scouting_report, get_next_opponent
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Sync routes run in AnyIO's threadpool; slow Yahoo calls (ingest, settings, waivers)
+    # shouldn't be able to exhaust it and queue up page loads behind them
+    anyio.to_thread.current_default_thread_limiter().total_tokens = get_settings().worker_threads
+    # Compiled templates persist across restarts, so a fresh worker skips recompiling them
+    cache_dir = get_settings().jinja_cache_dir or _JINJA_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    templates.env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    _template_mtimes()
     migrate()
     # Ensure full app schema exists (players, teams, recommendations, etc.)
     store_migrate()
@@ -34,108 +51,149 @@ async def lifespan(app: FastAPI):
 
 
 app = FastAPI(title="Fantasy Bot", lifespan=lifespan)
-templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "templates"))
+logger = logging.getLogger(__name__)
+_TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
+_JINJA_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache", "jinja")
+templates = Jinja2Templates(directory=_TEMPLATES_DIR)
+
+
+@lru_cache(maxsize=1)
+def _template_mtimes() -> tuple:
+    # Read once (at startup via lifespan); templates are not edited under a running server
+    return tuple(sorted((e.name, e.stat().st_mtime_ns) for e in os.scandir(_TEMPLATES_DIR)))
+
+
+def _render_page(request: Request, name: str, context: dict) -> Response:
+    """Render a template, or answer 304 when the browser already has this exact page.
+
+    The ETag hashes the template name, the templates' mtimes and the whole context, so
+    any change in what would be rendered yields a new tag; only the render is skipped.
+    """
+    try:
+        digest = hashlib.blake2b(_json.dumps([name, _template_mtimes(), context]), digest_size=16).hexdigest()
+    except (OSError, TypeError):
+        # Unhashable context (non-JSON values): render without validators
+        return templates.TemplateResponse(request, name, context)
+    etag = f'"{digest}"'
+    # Browsers must revalidate before reusing the page, which is what makes 304s useful
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in (tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return templates.TemplateResponse(request, name, context, headers=headers)
 
 
 
 
 @app.get("/health")
-def health() -> dict:
+async def health() -> dict:
+    # No I/O, so it runs on the event loop and answers even when the threadpool is busy
     return {"ok": True}
 
 
+@lru_cache(maxsize=16)
+def _settings_from_json(payload_json: bytes) -> LeagueSettings:
+    return LeagueSettings.from_yahoo({"settings": _json.loads(payload_json)})
+
+
+def _league_settings(payload: dict) -> LeagueSettings:
+    """LeagueSettings.from_yahoo({"settings": payload}), built once per distinct payload.
+
+    Every action reparses the same stored settings; keying on the encoded payload lets a
+    newly loaded league miss the cache on its own. The model is shared, so treat it as
+    read-only.
+    """
+    return _settings_from_json(_json.dumps(payload))
+
+
+def _json_list_response(fields: dict, key: str, items) -> Response:
+    """JSON object of ``fields`` plus ``key``: [item.to_dict(), ...], encoded item by item.
+
+    Each dict is encoded (orjson) and dropped straight away instead of building the
+    whole list of dicts first, so peak memory is one copy of the encoded payload.
+    """
+    head = _json.dumps(fields)[:-1] + (b"," if fields else b"")
+    encoded = b",".join([_json.dumps(item.to_dict()) for item in items])
+    return Response(b"".join((head, _json.dumps(key), b":[", encoded, b"]}")), media_type="application/json")
+
+
 @app.get("/api/news")
 def api_news(limit: int = 30):
     """Get latest fantasy football news from all sources."""
-    from fastapi.responses import JSONResponse
     items = fetch_all_news(max_age_minutes=20, limit_per_source=min(20, limit))
-    return JSONResponse({"items": [it.to_dict() for it in items[:limit]]})
+    return _json_list_response({}, "items", items[:limit])
 
 
 @app.get("/api/projections")
 def api_projections(week: int, position: Optional[str] = None):
     """Get weekly player projections from FantasyPros."""
-    from fastapi.responses import JSONResponse
     projections = get_projections(week, position, use_cache=True, max_age_hours=24)
-    return JSONResponse({
-        "week": week,
-        "position": position,
-        "count": len(projections),
-        "projections": [p.to_dict() for p in projections[:100]]  # Limit response size
-    })
+    return _json_list_response(
+        {"week": week, "position": position, "count": len(projections)},
+        "projections",
+        projections[:100],  # Limit response size
+    )
 
 
 @app.get("/")
 def list_notifications(request: Request, kind: Optional[str] = None):
-    rows = inbox_list(kind)
-    settings_payload = latest_settings_payload() or {}
-    pending_count = count_pending_recommendations()
-
-    # Get league teams for scouting report dropdown and my starting lineup
-    teams_list = []
-    my_lineup = []
-    if settings_payload:
-        conn = get_connection()
-        try:
-            cfg = get_settings()
-            my_team_id = cfg.team_key.split(".")[-1] if cfg.team_key else None
-
-            cur = conn.cursor()
-            cur.execute("SELECT id, name, manager FROM teams WHERE id != ? ORDER BY name", (my_team_id,))
-            for row in cur.fetchall():
-                teams_list.append({"id": row[0], "name": row[1], "manager": row[2]})
-
-            # Get my current lineup using REAL Yahoo slot data
-            cur.execute("SELECT MAX(week) FROM matchups")
-            current_week_result = cur.fetchone()
-            current_week = current_week_result[0] if current_week_result else 1
-
-            cur.execute("""
-                SELECT p.name, p.position, p.team, p.bye_week, r.status, r.slot
-                FROM rosters r
-                JOIN players p ON r.player_id = p.id
-                WHERE r.team_id = ? AND r.week = ?
-                GROUP BY p.name, p.position, p.team
-                ORDER BY
-                    CASE WHEN r.slot = 'BN' THEN 99 WHEN r.slot IS NULL THEN 100 ELSE 0 END,
-                    CASE p.position
-                        WHEN 'QB' THEN 1
-                        WHEN 'RB' THEN 2
-                        WHEN 'WR' THEN 3
-                        WHEN 'TE' THEN 4
-                        WHEN 'K' THEN 5
-                        WHEN 'DEF' THEN 6
-                        ELSE 7
-                    END,
-                    p.name
-            """, (my_team_id, current_week))
-
-            # Use Yahoo's actual slot data: BN = bench, anything else = starter
-            for row in cur.fetchall():
-                slot = row[5]  # Yahoo slot: QB, RB, WR, W/R/T, TE, K, DEF, BN, etc.
-                is_starter = (slot and slot != 'BN' and slot != 'IR')
-
-                my_lineup.append({
-                    "name": row[0],
-                    "position": row[1],
-                    "team": row[2] or "FA",
-                    "bye_week": row[3],
-                    "status": row[4] or "Active",
-                    "is_starter": is_starter,
-                    "slot": slot or "?"
-                })
-        except Exception as e:
-            print(f"Error fetching lineup data: {e}")
-            pass
-        finally:
-            conn.close()
-
-    return templates.TemplateResponse(
+    # One pooled reader serves every query on the page
+    with get_reader() as conn:
+        home = get_home_payload(kind, connection=conn)
+        rows = home["rows"]
+        settings_payload = home["settings"] or {}
+        pending_count = count_pending_recommendations(connection=conn)
+
+        # Get league teams for scouting report dropdown and my starting lineup
+        teams_list = []
+        my_lineup = []
+        if settings_payload:
+            try:
+                cfg = get_settings()
+                my_team_id = cfg.team_key.split(".")[-1] if cfg.team_key else None
+
+                cur = conn.cursor()
+                cur.execute("SELECT id, name, manager FROM teams WHERE id != ? ORDER BY name", (my_team_id,))
+                for row in cur.fetchall():
+                    teams_list.append({"id": row[0], "name": row[1], "manager": row[2]})
+
+                # Get my current lineup using REAL Yahoo slot data; the current week is
+                # resolved in the same statement
+                cur.execute("""
+                    SELECT p.name, p.position, p.team, p.bye_week, r.status, r.slot
+                    FROM rosters r
+                    JOIN players p ON r.player_id = p.id
+                    WHERE r.team_id = ? AND r.week = (SELECT MAX(week) FROM matchups)
+                    GROUP BY p.name, p.position, p.team
+                    ORDER BY
+                        CASE WHEN r.slot = 'BN' THEN 99 WHEN r.slot IS NULL THEN 100 ELSE 0 END,
+                        p.position_rank,
+                        p.name
+                """, (my_team_id,))
+
+                # Use Yahoo's actual slot data: BN = bench, anything else = starter
+                for row in cur.fetchall():
+                    slot = row[5]  # Yahoo slot: QB, RB, WR, W/R/T, TE, K, DEF, BN, etc.
+                    is_starter = (slot and slot != 'BN' and slot != 'IR')
+
+                    my_lineup.append({
+                        "name": row[0],
+                        "position": row[1],
+                        "team": row[2] or "FA",
+                        "bye_week": row[3],
+                        "status": row[4] or "Active",
+                        "is_starter": is_starter,
+                        "slot": slot or "?"
+                    })
+            except Exception as e:
+                print(f"Error fetching lineup data: {e}")
+                pass
+
+    response = _render_page(
         request,
         "index.html",
         {
             "notifications": rows,
-            "unread": inbox_unread(),
+            "unread": home["unread"],
             "filter_kind": kind or "",
             "league_settings": settings_payload,
             "pending_recs": pending_count,
@@ -143,33 +201,46 @@ def list_notifications(request: Request, kind: Optional[str] = None):
             "my_lineup": my_lineup,
         },
     )
+    # Opening the Inbox usually precedes a GM Brief; warm its context and news, but only
+    # for a full page (a 304 means the browser is just revalidating)
+    if settings_payload and response.status_code == status.HTTP_200_OK:
+        try:
+            prefetch_gm_context(_league_settings(settings_payload))
+        except Exception:
+            logger.exception("GM brief prefetch failed")
+    return response
 
 
 @app.get("/notifications/{notification_id}")
 def notification_detail(request: Request, notification_id: int):
-    row = inbox_get(notification_id)
-    if row is None:
-        raise HTTPException(status_code=404, detail="Notification not found")
+    with get_reader() as conn:
+        row = inbox_get(notification_id, connection=conn)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Notification not found")
 
-    payload_obj = {}
-    payload_raw = row.get("payload") or "{}"
+        payload_obj = {}
+        payload_raw = row.get("payload") or "{}"
 
-    # Ensure payload_obj is always a dict
-    try:
-        parsed = _json.loads(payload_raw)
-        # Handle case where parsed value is a string (double-encoded JSON)
-        if isinstance(parsed, str):
-            payload_obj = _json.loads(parsed)
-        elif isinstance(parsed, dict):
-            payload_obj = parsed
-        else:
-            payload_obj = {}
-    except Exception as e:
-        # If parsing fails, payload_obj stays as empty dict
-        payload_obj = {"_parse_error": str(e), "_raw": payload_raw[:100]}
+        # Ensure payload_obj is always a dict
+        try:
+            parsed = _json.loads(payload_raw)
+            # Handle case where parsed value is a string (double-encoded JSON)
+            if isinstance(parsed, str):
+                payload_obj = _json.loads(parsed)
+            elif isinstance(parsed, dict):
+                payload_obj = parsed
+            else:
+                payload_obj = {}
+        except Exception as e:
+            # If parsing fails, payload_obj stays as empty dict
+            payload_obj = {"_parse_error": str(e), "_raw": payload_raw[:100]}
+
+        if payload_obj.get("state_ref") is not None:
+            payload_obj = inbox_detail(notification_id, connection=conn) or payload_obj
+        unread = inbox_unread(connection=conn)
 
     return templates.TemplateResponse(
-        request, "detail.html", {"n": row, "payload_obj": payload_obj, "unread": inbox_unread()}
+        request, "detail.html", {"n": row, "payload_obj": payload_obj, "unread": unread}
     )
 
 
@@ -210,8 +281,7 @@ def action_gm_brief():
     if not payload:
         notify("info", "Missing LeagueSettings", "Load settings before posting GM Brief.", {})
         return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
-    raw = {"settings": payload}
-    settings = LeagueSettings.from_yahoo(raw)
+    settings = _league_settings(payload)
     post_gm_brief(settings)
     return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -231,8 +301,7 @@ def action_optimize_lineup():
         return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
     
     try:
-        raw = {"settings": payload}
-        settings = LeagueSettings.from_yahoo(raw)
+        settings = _league_settings(payload)
         
         from .lineup_actions import run_lineup_optimizer_action
         msg_id = run_lineup_optimizer_action(settings)
@@ -249,7 +318,7 @@ def action_optimize_lineup():
 @app.get("/approvals")
 def approvals(request: Request):
     recs = list_recommendations(status="pending")
-    return templates.TemplateResponse(request, "approvals.html", {"recs": recs})
+    return _render_page(request, "approvals.html", {"recs": recs})
 
 
 @app.post("/approvals/{rec_id}/approve")
@@ -265,7 +334,6 @@ def approve(rec_id: int):
     # Attempt Yahoo write for waivers if configured
     try:
         if rec.get("kind") == "waivers":
-            import json as _json
             payload = {}
             try:
                 payload = _json.loads(rec.get("payload") or "{}")
@@ -285,20 +353,10 @@ def approve(rec_id: int):
             faab = item0.get("faab_min") or item0.get("faab") or 0
             if not player_key:
                 raise RuntimeError("Missing player_id in recommendation payload")
-            xml = f"""
-<fantasy_content>
-  <transaction>
-    <type>add</type>
-    <faab_bid>{int(faab) if faab else 0}</faab_bid>
-    <player>
-      <player_key>{player_key}</player_key>
-    </player>
-    <team_key>{team_key}</team_key>
-  </transaction>
-</fantasy_content>""".strip()
+            xml = add_transaction_xml(player_key, team_key, faab)
             client = YahooClient()
             resp = client.post_xml(f"league/{league_key}/transactions", xml)
-            insert_transaction_raw(kind="waiver_submit", team_id=None, raw=f"request={_json.dumps({'xml': xml})}; response={resp.text}")
+            insert_transaction_raw(kind="waiver_submit", team_id=None, raw=f"request={_json.dumps_str({'xml': xml})}; response={resp.text}")
             notify("info", "Waiver submitted", f"Submitted add for {player_key}", {"rec_id": rec_id})
     except Exception as err:
         notify("info", "Yahoo write error", f"{err}", {"rec_id": rec_id})
@@ -319,14 +377,11 @@ def action_scouting_report(opponent_team_id: str = Form(...)):
         settings = LeagueSettings(**payload)
 
         # Get current week
-        conn = get_connection()
-        try:
+        with get_reader() as conn:
             cur = conn.cursor()
             cur.execute("SELECT MAX(week) FROM matchups")
             result = cur.fetchone()
             current_week = result[0] if result and result[0] else 1
-        finally:
-            conn.close()
 
         # Generate and post report
         msg_id = post_scouting_report(settings, opponent_team_id, current_week)
@@ -346,20 +401,10 @@ def action_approve_waiver(add_player_id: str = Form(...), drop_player_id: Option
         team_key = settings.team_key
         if not league_key or not team_key:
             raise RuntimeError("LEAGUE_KEY and TEAM_KEY must be set in env for Yahoo writes")
-        xml = f"""
-<fantasy_content>
-  <transaction>
-    <type>add</type>
-    <faab_bid>{int(bid_amount or 0)}</faab_bid>
-    <player>
-      <player_key>{add_player_id}</player_key>
-    </player>
-    <team_key>{team_key}</team_key>
-  </transaction>
-</fantasy_content>""".strip()
+        xml = add_transaction_xml(add_player_id, team_key, bid_amount)
         client = YahooClient()
         resp = client.post_xml(f"league/{league_key}/transactions", xml)
-        insert_transaction_raw(kind="waiver_submit", team_id=None, raw=f"request={_json.dumps({'xml': xml})}; response={resp.text}")
+        insert_transaction_raw(kind="waiver_submit", team_id=None, raw=f"request={_json.dumps_str({'xml': xml})}; response={resp.text}")
         notify("waivers", "Executed waiver", f"Added {add_player_id} for {int(bid_amount or 0)} FAAB", {"add_player_id": add_player_id, "bid": bid_amount})
     except Exception as err:
         notify("info", "Waiver execute error", f"{err}", {"add_player_id": add_player_id, "bid": bid_amount})
@@ -385,8 +430,7 @@ def action_waivers_demo():
     if not payload:
         notify("info", "Missing LeagueSettings", "Load settings before running waivers.", {})
         return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
-    raw = {"settings": payload}
-    settings = LeagueSettings.from_yahoo(raw)
+    settings = _league_settings(payload)
     current = {"RB": 2, "WR": 2, "QB": 1, "TE": 1}
     free_agents = [
         {"id": "p_rb1", "name": "Upside RB", "position": "RB", "proj_base": 11, "trend_last2": 2, "schedule_next4": 1},
@@ -409,8 +453,7 @@ def action_waivers_live(league_key: str = Form(None)):
     if not payload:
         notify("info", "Missing LeagueSettings", "Load settings before running waivers.", {})
         return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
-    raw = {"settings": payload}
-    settings = LeagueSettings.from_yahoo(raw)
+    settings = _league_settings(payload)
     try:
         client = YahooClient()
         fa = free_agents_from_yahoo(client, league_key)
@@ -432,7 +475,7 @@ def action_load_settings(league_key: str = Form(None)):
         return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
     try:
         client = YahooClient()
-        data = client.get(f"league/{league_key}", params={"format": "json"}).json()
+        data = _json.loads(client.get(f"league/{league_key}", params={"format": "json"}).content)
         settings = LeagueSettings.from_yahoo(data)
         notify("info", "Detected League Settings", "Loaded from Yahoo.", settings.model_dump())
     except Exception as err:
@@ -450,21 +493,14 @@ def action_ingest_now(league_key: str = Form(None)):
         return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
     try:
         client = YahooClient()
-        bundle = fetch_league_bundle(client, league_key, cache_dir=".cache")
-        # Snapshot each endpoint's raw JSON
-        import json as _json
-        endpoints = {
-            "league": f"league/{league_key}",
-            "teams": f"league/{league_key}/teams",
-            "rosters": f"league/{league_key}/rosters",
-            "players": f"league/{league_key}/players",
-            "matchups": f"league/{league_key}/scoreboard",
-            "standings": f"league/{league_key}/standings",
-            "transactions": f"league/{league_key}/transactions",
-        }
-        for name, data in bundle.items():
-            ep = endpoints.get(name, name)
-            record_snapshot(endpoint=ep, params={"format": "json"}, raw=_json.dumps(data))
+        # An explicit ingest should see fresh data; unchanged endpoints come back as 304s
+        bundle = fetch_league_bundle(client, league_key, cache_dir=".cache", revalidate=True)
+        # Snapshot each endpoint's raw JSON in one transaction. The raw text stays stdlib
+        # json.dumps output: snapshots are deduplicated by a hash of it, so changing its
+        # formatting would re-insert every endpoint already stored
+        endpoints = bundle_endpoints(league_key)
+        params = {"format": "json"}
+        record_snapshots_many((endpoints.get(name, name), params, json.dumps(data)) for name, data in bundle.items())
         # Persist into sqlite for local querying
         persist_bundle(bundle)
         notify("info", "Ingest complete", f"Cached and snapshotted {len(bundle)} endpoints.", {"league_key": league_key, "endpoints": list(bundle.keys())})
@@ -49,6 +49,23 @@ class PositionalLimits(BaseModel):
     dst: int = 0
 
 
+# Yahoo roster position -> PositionalLimits field; other positions only appear in roster_slots
+_LIMIT_FIELDS = {
+    "QB": "qb",
+    "RB": "rb",
+    "WR": "wr",
+    "TE": "te",
+    "FLEX": "flex",
+    "W/R/T": "flex",
+    "SUPERFLEX": "superflex",
+    "Q/W/R/T": "superflex",
+    "K": "k",
+    "DEF": "dst",
+    "DST": "dst",
+}
+_BENCH_POSITIONS = frozenset({"BN", "BENCH"})
+
+
 class LeagueSettings(BaseModel):
     roster_slots: Dict[str, int]  # e.g., {"QB":1,"RB":2,"WR":2,"TE":1,"FLEX":1,"BENCH":5}
     positional_limits: PositionalLimits
@@ -66,27 +83,24 @@ class LeagueSettings(BaseModel):
         # Roster / position slots
         positions = settings.get("roster_positions") or settings.get("roster", {}).get("positions") or []
         slot_map: Dict[str, int] = {}
+        # Positional limits are summed in the same pass as the slot map
+        limits = dict.fromkeys(("qb", "rb", "wr", "te", "flex", "superflex", "k", "dst"), 0)
         bench = 0
         for pos in positions:
             # Yahoo may present as {"position": "RB", "count": 2} or similar
-            name = pos.get("position") or pos.get("name") or str(pos)
+            name = (pos.get("position") or pos.get("name") or str(pos)).upper()
             count = int(pos.get("count", 1))
-            if name.upper() in {"BN", "BENCH"}:
+            if name in _BENCH_POSITIONS:
                 bench += count
-            else:
-                slot_map[name.upper()] = slot_map.get(name.upper(), 0) + count
-
-        # Positional limits inferred from slot map
-        positional_limits = PositionalLimits(
-            qb=slot_map.get("QB", 0),
-            rb=slot_map.get("RB", 0),
-            wr=slot_map.get("WR", 0),
-            te=slot_map.get("TE", 0),
-            flex=slot_map.get("FLEX", 0) + slot_map.get("W/R/T", 0),
-            superflex=slot_map.get("SUPERFLEX", 0) + slot_map.get("Q/W/R/T", 0),
-            k=slot_map.get("K", 0),
-            dst=slot_map.get("DEF", 0) + slot_map.get("DST", 0),
-        )
+                continue
+            slot_map[name] = slot_map.get(name, 0) + count
+            field = _LIMIT_FIELDS.get(name)
+            if field is not None:
+                limits[field] += count
+
+        # Every value below is already coerced to its field type, so the models are built
+        # with model_construct and skip validation; external callers still validate
+        positional_limits = PositionalLimits.model_construct(**limits)
 
         # FAAB & deadline
         faab = settings.get("faab") or settings.get("faab_budget")
@@ -100,7 +114,7 @@ class LeagueSettings(BaseModel):
         ppr = 1.0 if ppr_mode in (True, 1, "full", "PPR") else 0.5 if str(ppr_mode).lower() in ("0.5", "half") else 0.0 if ppr_mode in (False, 0, "standard") else 1.0
 
         # Map known stat weights if present
-        sr = ScoringRules(
+        sr = ScoringRules.model_construct(
             ppr=ppr,
             pass_td=float(scoring_raw.get("pass_td", 4)),
             pass_yd=float(scoring_raw.get("pass_yd", 0.04)),
@@ -128,7 +142,7 @@ class LeagueSettings(BaseModel):
                 continue
         sr.bonuses = bonuses
 
-        return cls(
+        return cls.model_construct(
             roster_slots=slot_map or {"QB": 1, "RB": 2, "WR": 2, "TE": 1, "FLEX": 1},
             positional_limits=positional_limits,
             bench_size=int(bench or settings.get("bench", 0) or 5),
@@ -0,0 +1,59 @@
+"""Speculative warm-up of GM brief inputs.
+
+Opening the Inbox is usually followed by generating a brief, so the brief's league
+context and news are computed in the background and handed to the next
+build_gm_brief() call if they are ready by then.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+from .db import get_pool
+from .models import LeagueSettings
+from .utils import TTLCache
+
+T = TypeVar("T")
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+# Window of one: at most one pending result per key, consumed by the next brief.
+# Keys carry the database change token, so a prefetch never stands in for data that
+# has since been re-synced; the TTL only bounds how long unclaimed results linger.
+_PENDING = TTLCache(maxsize=8, ttl=60)
+_news_warmup: Optional[Future] = None
+
+
+def context_key(settings: LeagueSettings) -> Hashable:
+    # Read the token before computing: a commit in between only makes the prefetch unusable
+    pool = get_pool()
+    return ("league_context", pool.path, pool.change_token(), settings.model_dump_json())
+
+
+def _submit(key: Hashable, compute: Callable[[], Any]) -> None:
+    if _PENDING.get(key) is None:
+        _PENDING.set(key, _EXECUTOR.submit(compute))
+
+
+def wait_or_compute(key: Hashable, compute: Callable[[], T]) -> T:
+    """Return a finished prefetch for ``key`` if there is one, otherwise compute inline.
+
+    Never blocks on an in-flight prefetch; failed prefetches fall back to ``compute``.
+    """
+    future: Future | None = _PENDING.pop(key)
+    if future is not None and future.done() and future.exception() is None:
+        return future.result()
+    return compute()
+
+
+def prefetch_gm_context(settings: LeagueSettings) -> None:
+    global _news_warmup
+    from .brief import BRIEF_NEWS_ARGS, _brief_news, _get_league_context
+
+    _submit(context_key(settings), lambda: _get_league_context(settings))
+    # _brief_news is TTL-cached, so running it here only warms that cache; nothing reads
+    # the result, so it isn't kept in _PENDING
+    if _news_warmup is None or _news_warmup.done():
+        _news_warmup = _EXECUTOR.submit(_brief_news, *BRIEF_NEWS_ARGS)
+
+
+__all__ = ["prefetch_gm_context", "wait_or_compute", "context_key"]
@@ -103,6 +103,15 @@ class PlayerProjection:
         )
 
 
+# PlayerProjection points field by settings.scoring.ppr (1 == 1.0, so int and float values match)
+_POINTS_ATTR_BY_PPR = {1.0: "fantasy_points_ppr", 0.5: "fantasy_points_half_ppr"}
+
+
+def points_attr_for(ppr: float) -> str:
+    """Name of the PlayerProjection fantasy-points field for a league's PPR setting."""
+    return _POINTS_ATTR_BY_PPR.get(ppr, "fantasy_points_standard")
+
+
 class ProjectionsCache:
     """File-based cache for projections."""
 
@@ -230,5 +239,5 @@ def get_player_projection(player_name: str, week: int, position: Optional[str] =
     return None
 
 
-__all__ = ["PlayerProjection", "get_projections", "get_player_projection"]
+__all__ = ["PlayerProjection", "get_projections", "get_player_projection", "points_attr_for"]
 
@@ -5,9 +5,12 @@ import json
 import os
 import sqlite3
 import sys
-from typing import Any, Dict, Optional, Tuple
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .db import get_connection
+import msgpack
+
+from .db import NOTIFICATION_INDEXES, cached_read, get_connection, get_reader, get_writer
 
 
 def migrate() -> None:
@@ -53,10 +56,15 @@ def migrate() -> None:
                 position TEXT,
                 team TEXT,
                 bye_week INTEGER,
+                position_rank INTEGER NOT NULL DEFAULT 7,
                 updated_at TEXT NOT NULL DEFAULT (datetime('now'))
             );
             """
         )
+        # Databases created before position_rank existed: add and backfill it once
+        if not any(col[1] == "position_rank" for col in c.execute("PRAGMA table_info(players)")):
+            c.execute("ALTER TABLE players ADD COLUMN position_rank INTEGER NOT NULL DEFAULT 7")
+            c.execute(f"UPDATE players SET position_rank = {_position_rank_sql('position')}")
         c.execute(
             """
             CREATE TABLE IF NOT EXISTS teams (
@@ -141,8 +149,8 @@ def migrate() -> None:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 run_id INTEGER NOT NULL,
                 name TEXT NOT NULL,
-                args TEXT,
-                result TEXT,
+                args BLOB,
+                result BLOB,
                 error TEXT,
                 created_at TEXT NOT NULL DEFAULT (datetime('now')),
                 FOREIGN KEY(run_id) REFERENCES agent_runs(id)
@@ -156,12 +164,18 @@ def migrate() -> None:
                 run_id INTEGER NOT NULL,
                 kind TEXT NOT NULL,
                 confidence REAL,
-                payload TEXT,
+                payload BLOB,
                 created_at TEXT NOT NULL DEFAULT (datetime('now')),
                 FOREIGN KEY(run_id) REFERENCES agent_runs(id)
             );
             """
         )
+        # Serves "my roster, latest week first" in the brief context.
+        # transactions_raw needs no index: ORDER BY id DESC walks the rowid b-tree, and
+        # matchups' UNIQUE(week, team_id) index already serves ORDER BY week DESC.
+        c.execute("CREATE INDEX IF NOT EXISTS idx_rosters_team_week ON rosters(team_id, week DESC)")
+        for sql in NOTIFICATION_INDEXES:
+            c.execute(sql)
 
         connection.commit()
     finally:
@@ -169,133 +183,161 @@ def migrate() -> None:
 
 
 # --- Upsert helpers ---
-def upsert_player(*, player_id: str, name: str, position: Optional[str] = None, team: Optional[str] = None, bye_week: Optional[int] = None) -> None:
-    connection = get_connection()
+_POSITION_RANKS = ("QB", "RB", "WR", "TE", "K", "DEF")
+
+
+def _position_rank_sql(column: str) -> str:
+    # Lineup display order (QB, RB, WR, TE, K, DEF, then everything else), stored on the
+    # player row at write time so roster reads sort on a plain integer
+    whens = " ".join(f"WHEN '{pos}' THEN {rank}" for rank, pos in enumerate(_POSITION_RANKS, 1))
+    return f"CASE {column} {whens} ELSE {len(_POSITION_RANKS) + 1} END"
+
+
+_UPSERT_PLAYER_SQL = f"""
+    INSERT INTO players(id, name, position, team, bye_week, position_rank)
+    VALUES(?1, ?2, ?3, ?4, ?5, {_position_rank_sql('?3')})
+    ON CONFLICT(id) DO UPDATE SET
+        name=excluded.name,
+        position=excluded.position,
+        position_rank=excluded.position_rank,
+        team=excluded.team,
+        bye_week=excluded.bye_week,
+        updated_at=datetime('now')
+"""
+
+_UPSERT_TEAM_SQL = """
+    INSERT INTO teams(id, name, manager, abbrev)
+    VALUES(?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name=excluded.name,
+        manager=excluded.manager,
+        abbrev=excluded.abbrev,
+        updated_at=datetime('now')
+"""
+
+_UPSERT_ROSTER_SQL = """
+    INSERT INTO rosters(team_id, player_id, week, status, slot)
+    VALUES(?, ?, ?, ?, ?)
+    ON CONFLICT(team_id, player_id, week) DO UPDATE SET
+        status=excluded.status,
+        slot=COALESCE(excluded.slot, slot)
+"""
+
+_UPSERT_MATCHUP_SQL = """
+    INSERT INTO matchups(week, team_id, opponent_id, is_playoffs, projected, actual, result)
+    VALUES(?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(week, team_id) DO UPDATE SET
+        opponent_id=excluded.opponent_id,
+        is_playoffs=excluded.is_playoffs,
+        projected=excluded.projected,
+        actual=excluded.actual,
+        result=excluded.result
+"""
+
+_INSERT_TRANSACTION_RAW_SQL = "INSERT INTO transactions_raw(kind, team_id, raw) VALUES(?, ?, ?)"
+
+
+def _executemany(sql: str, rows: Iterable[Tuple[Any, ...]], connection: Optional[sqlite3.Connection]) -> None:
+    # With a caller-supplied connection the caller owns the transaction; otherwise commit here
+    if connection is not None:
+        connection.executemany(sql, rows)
+        return
+    own = get_connection()
     try:
-        c = connection.cursor()
-        c.execute(
-            """
-            INSERT INTO players(id, name, position, team, bye_week)
-            VALUES(?, ?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET
-                name=excluded.name,
-                position=excluded.position,
-                team=excluded.team,
-                bye_week=excluded.bye_week,
-                updated_at=datetime('now')
-            """,
-            (player_id, name, position, team, bye_week),
-        )
-        connection.commit()
+        own.executemany(sql, rows)
+        own.commit()
     finally:
-        connection.close()
+        own.close()
+
+
+def upsert_player(*, player_id: str, name: str, position: Optional[str] = None, team: Optional[str] = None, bye_week: Optional[int] = None) -> None:
+    upsert_players_many([(player_id, name, position, team, bye_week)])
 
 
 def upsert_team(*, team_id: str, name: str, manager: Optional[str] = None, abbrev: Optional[str] = None) -> None:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute(
-            """
-            INSERT INTO teams(id, name, manager, abbrev)
-            VALUES(?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET
-                name=excluded.name,
-                manager=excluded.manager,
-                abbrev=excluded.abbrev,
-                updated_at=datetime('now')
-            """,
-            (team_id, name, manager, abbrev),
-        )
-        connection.commit()
-    finally:
-        connection.close()
+    upsert_teams_many([(team_id, name, manager, abbrev)])
 
 
 def upsert_roster(*, team_id: str, player_id: str, week: int, status: Optional[str] = None, slot: Optional[str] = None) -> None:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute(
-            """
-            INSERT INTO rosters(team_id, player_id, week, status, slot)
-            VALUES(?, ?, ?, ?, ?)
-            ON CONFLICT(team_id, player_id, week) DO UPDATE SET
-                status=excluded.status,
-                slot=COALESCE(excluded.slot, slot)
-            """,
-            (team_id, player_id, week, status, slot),
-        )
-        connection.commit()
-    finally:
-        connection.close()
+    upsert_rosters_many([(team_id, player_id, week, status, slot)])
 
 
 def upsert_matchup(*, week: int, team_id: str, opponent_id: str, is_playoffs: bool = False, projected: Optional[float] = None, actual: Optional[float] = None, result: Optional[str] = None) -> None:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute(
-            """
-            INSERT INTO matchups(week, team_id, opponent_id, is_playoffs, projected, actual, result)
-            VALUES(?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(week, team_id) DO UPDATE SET
-                opponent_id=excluded.opponent_id,
-                is_playoffs=excluded.is_playoffs,
-                projected=excluded.projected,
-                actual=excluded.actual,
-                result=excluded.result
-            """,
-            (week, team_id, opponent_id, 1 if is_playoffs else 0, projected, actual, result),
-        )
-        connection.commit()
-    finally:
-        connection.close()
+    upsert_matchups_many([(week, team_id, opponent_id, 1 if is_playoffs else 0, projected, actual, result)])
+
+
+def upsert_players_many(rows: Iterable[Tuple[Any, ...]], *, connection: Optional[sqlite3.Connection] = None) -> None:
+    """Rows are (player_id, name, position, team, bye_week)."""
+    _executemany(_UPSERT_PLAYER_SQL, rows, connection)
+
+
+def upsert_teams_many(rows: Iterable[Tuple[Any, ...]], *, connection: Optional[sqlite3.Connection] = None) -> None:
+    """Rows are (team_id, name, manager, abbrev)."""
+    _executemany(_UPSERT_TEAM_SQL, rows, connection)
+
+
+def upsert_rosters_many(rows: Iterable[Tuple[Any, ...]], *, connection: Optional[sqlite3.Connection] = None) -> None:
+    """Rows are (team_id, player_id, week, status, slot); later rows win, a NULL slot keeps the old one."""
+    _executemany(_UPSERT_ROSTER_SQL, rows, connection)
+
+
+def upsert_matchups_many(rows: Iterable[Tuple[Any, ...]], *, connection: Optional[sqlite3.Connection] = None) -> None:
+    """Rows are (week, team_id, opponent_id, is_playoffs, projected, actual, result)."""
+    _executemany(_UPSERT_MATCHUP_SQL, rows, connection)
+
+
+def insert_transactions_raw_many(rows: Iterable[Tuple[Any, ...]], *, connection: Optional[sqlite3.Connection] = None) -> None:
+    """Rows are (kind, team_id, raw)."""
+    _executemany(_INSERT_TRANSACTION_RAW_SQL, rows, connection)
 
 
 # --- Audit / snapshots ---
+def _snapshot_digest(endpoint: str, params: Dict[str, Any], raw: str) -> str:
+    # Stdlib json with sorted keys keeps digests stable against rows already stored
+    payload = {"endpoint": endpoint, "params": params, "raw": raw}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
 def record_snapshot(*, endpoint: str, params: Optional[Dict[str, Any]], raw: str) -> Tuple[str, bool]:
-    payload = {
-        "endpoint": endpoint,
-        "params": params or {},
-        "raw": raw,
-    }
-    digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
-    connection = get_connection()
-    inserted = False
-    try:
-        c = connection.cursor()
-        try:
+    return record_snapshots_many([(endpoint, params, raw)])[0]
+
+
+def record_snapshots_many(
+    rows: Iterable[Tuple[str, Optional[Dict[str, Any]], str]],
+    *,
+    connection: Optional[sqlite3.Connection] = None,
+) -> List[Tuple[str, bool]]:
+    """Rows are (endpoint, params, raw); returns (digest, inserted) per row, in order.
+
+    All rows land in one transaction. Duplicate content is skipped rather than raising.
+    """
+    results: List[Tuple[str, bool]] = []
+
+    def insert(conn: sqlite3.Connection) -> None:
+        c = conn.cursor()
+        for endpoint, params, raw in rows:
+            params = params or {}
+            digest = _snapshot_digest(endpoint, params, raw)
             c.execute(
-                "INSERT INTO snapshots(endpoint, params, content_hash, raw) VALUES(?, ?, ?, ?)",
-                (endpoint, json.dumps(params or {}), digest, raw),
+                "INSERT OR IGNORE INTO snapshots(endpoint, params, content_hash, raw) VALUES(?, ?, ?, ?)",
+                (endpoint, json.dumps(params), digest, raw),
             )
-            inserted = True
-        except sqlite3.IntegrityError:
-            # Duplicate content_hash; ignore
-            inserted = False
-        connection.commit()
-    finally:
-        connection.close()
-    return digest, inserted
+            results.append((digest, c.rowcount == 1))
+
+    if connection is not None:
+        insert(connection)
+    else:
+        with get_writer() as own:
+            insert(own)
+    return results
 
 
 def insert_transaction_raw(*, kind: Optional[str], team_id: Optional[str], raw: str) -> None:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute(
-            "INSERT INTO transactions_raw(kind, team_id, raw) VALUES(?, ?, ?)",
-            (kind, team_id, raw),
-        )
-        connection.commit()
-    finally:
-        connection.close()
+    insert_transactions_raw_many([(kind, team_id, raw)])
 
 
 def list_recommendations(status: str = "pending") -> list[dict]:
-    connection = get_connection()
-    try:
+    with get_reader() as connection:
         c = connection.cursor()
         c.execute(
             "SELECT * FROM recommendations WHERE status = ? ORDER BY created_at DESC",
@@ -303,95 +345,132 @@ def list_recommendations(status: str = "pending") -> list[dict]:
         )
         rows = [dict(r) for r in c.fetchall()]
         return rows
-    finally:
-        connection.close()
 
 
 def set_recommendation_status(rec_id: int, status: str) -> None:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute("UPDATE recommendations SET status = ? WHERE id = ?", (status, rec_id))
-        connection.commit()
-    finally:
-        connection.close()
+    with get_writer() as connection:
+        connection.execute("UPDATE recommendations SET status = ? WHERE id = ?", (status, rec_id))
 
 
-def count_pending_recommendations() -> int:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        # Be resilient if migrations haven't created the table yet
-        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='recommendations'")
-        if not c.fetchone():
-            return 0
-        c.execute("SELECT COUNT(1) FROM recommendations WHERE status = 'pending'")
-        row = c.fetchone()
-        return int(row[0]) if row else 0
-    finally:
-        connection.close()
+def _count_pending(connection: sqlite3.Connection) -> int:
+    c = connection.cursor()
+    # Be resilient if migrations haven't created the table yet
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='recommendations'")
+    if not c.fetchone():
+        return 0
+    c.execute("SELECT COUNT(1) FROM recommendations WHERE status = 'pending'")
+    row = c.fetchone()
+    return int(row[0]) if row else 0
+
+
+def count_pending_recommendations(*, connection: Optional[sqlite3.Connection] = None) -> int:
+    """Pending recommendations, cached until the database next changes."""
+    return cached_read("store.pending_recommendations", _count_pending, connection=connection)
 
 
 def get_recommendation(rec_id: int) -> Optional[dict]:
-    connection = get_connection()
-    try:
+    with get_reader() as connection:
         c = connection.cursor()
         c.execute("SELECT * FROM recommendations WHERE id = ?", (rec_id,))
         row = c.fetchone()
         return dict(row) if row else None
-    finally:
-        connection.close()
 
 
 # --- Agent telemetry helpers ---
+# One agent run logs every tool call and decision; these go through the pooled writer
+# instead of opening a connection per row
 def insert_agent_run(task: str) -> int:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute("INSERT INTO agent_runs(task) VALUES(?)", (task,))
-        connection.commit()
+    with get_writer() as connection:
+        c = connection.execute("INSERT INTO agent_runs(task) VALUES(?)", (task,))
         return int(c.lastrowid)
-    finally:
-        connection.close()
 
 
 def finish_agent_run(run_id: int, status: str, tokens_in: Optional[int] = None, tokens_out: Optional[int] = None) -> None:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute(
+    with get_writer() as connection:
+        connection.execute(
             "UPDATE agent_runs SET finished_at=datetime('now'), status=?, tokens_in=?, tokens_out=? WHERE id=?",
             (status, tokens_in, tokens_out, run_id),
         )
-        connection.commit()
-    finally:
-        connection.close()
 
 
-def log_tool_call(run_id: int, name: str, args: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute(
+def log_tool_call(run_id: int, name: str, args: bytes, result: Optional[bytes] = None, error: Optional[str] = None) -> None:
+    with get_writer() as connection:
+        connection.execute(
             "INSERT INTO tool_calls(run_id,name,args,result,error) VALUES(?,?,?,?,?)",
             (run_id, name, args, result, error),
         )
-        connection.commit()
-    finally:
-        connection.close()
 
 
-def insert_decision(run_id: int, kind: str, confidence: Optional[float], payload: str) -> None:
-    connection = get_connection()
-    try:
-        c = connection.cursor()
-        c.execute(
+def insert_decision(run_id: int, kind: str, confidence: Optional[float], payload: bytes) -> None:
+    with get_writer() as connection:
+        connection.execute(
             "INSERT INTO decisions(run_id,kind,confidence,payload) VALUES(?,?,?,?)",
             (run_id, kind, confidence, payload),
         )
-        connection.commit()
+
+
+def decode_log_payload(blob: Optional[bytes | str]) -> Any:
+    """Decode a tool_calls args/result or decisions payload value.
+
+    New rows are msgpack BLOBs; rows written before the switch are JSON text.
+    """
+    if blob is None:
+        return None
+    if isinstance(blob, str):
+        return json.loads(blob)
+    return msgpack.unpackb(blob, raw=False, strict_map_key=False)
+
+
+class AgentRunLog:
+    """Buffers tool-call and decision rows for one agent run until the run finishes."""
+
+    def __init__(self, run_id: int) -> None:
+        self.run_id = run_id
+        self.status = "ok"
+        self.logs: List[Tuple[Any, ...]] = []
+        self.decisions: List[Tuple[Any, ...]] = []
+
+    def log_tool_call(self, name: str, args: bytes, result: Optional[bytes] = None, error: Optional[str] = None) -> None:
+        self.logs.append((self.run_id, name, args, result, error))
+
+    def insert_decision(self, kind: str, confidence: Optional[float], payload: bytes) -> None:
+        self.decisions.append((self.run_id, kind, confidence, payload))
+
+    def flush_tool_calls(self) -> None:
+        """Write the tool calls buffered so far, e.g. before posting something that reads them."""
+        if not self.logs:
+            return
+        with get_writer() as connection:
+            connection.executemany("INSERT INTO tool_calls(run_id,name,args,result,error) VALUES(?,?,?,?,?)", self.logs)
+        self.logs = []
+
+
+@contextmanager
+def agent_run_transaction(task: str) -> Iterator[AgentRunLog]:
+    """Record an agent run, flushing its tool calls, decisions and final status in one commit.
+
+    The agent_runs row is committed up front so the run id exists (and no write lock is
+    held) while the run posts to the Inbox; everything else is written on exit, apart
+    from tool calls the body flushes early with ``run.flush_tool_calls()``. The run is
+    marked ``error`` if the body raises.
+    """
+    run = AgentRunLog(insert_agent_run(task))
+    try:
+        yield run
+    except BaseException:
+        run.status = "error"
+        raise
     finally:
-        connection.close()
+        # Through the pool's single writer, like insert_agent_run(), so the flush queues
+        # behind other pooled writes instead of racing them for the database lock
+        with get_writer() as connection:
+            c = connection.cursor()
+            c.executemany("INSERT INTO tool_calls(run_id,name,args,result,error) VALUES(?,?,?,?,?)", run.logs)
+            c.executemany("INSERT INTO decisions(run_id,kind,confidence,payload) VALUES(?,?,?,?)", run.decisions)
+            c.execute(
+                "UPDATE agent_runs SET finished_at=datetime('now'), status=? WHERE id=?",
+                (run.status, run.run_id),
+            )
 
 
 def main(argv: Optional[list[str]] = None) -> int:
@@ -1,4 +1,12 @@
+import functools
 import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+_MISSING = object()
 
 
 def normalize_league_key(raw: str | None) -> str | None:
@@ -13,6 +21,78 @@ def normalize_league_key(raw: str | None) -> str | None:
     return s
 
 
-__all__ = ["normalize_league_key"]
+class TTLCache:
+    """Small thread-safe LRU mapping whose entries expire ``ttl`` seconds after being set.
+
+    Expired entries are refreshed inline by ``get_or_set``: the caller that finds a stale
+    value recomputes it and gets the fresh result.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], T]) -> T:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[1] if entry else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def ttl_cache(ttl: float, maxsize: int = 128) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Memoize a function's results for ``ttl`` seconds, keyed by its (hashable) arguments.
+
+    The wrapper exposes ``cache`` and ``cache_clear()`` like ``functools.lru_cache``.
+    """
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            return cache.get_or_set(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+__all__ = ["normalize_league_key", "TTLCache", "ttl_cache"]
 
 
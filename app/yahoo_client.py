@@ -4,9 +4,12 @@ import json
 import os
 import time
 import base64
+import threading
 from dataclasses import dataclass
 from pathlib import Path
+from string import Template
 from typing import Any, Dict, Optional
+from xml.sax.saxutils import escape as _xml_escape
 
 import httpx
 
@@ -22,6 +25,20 @@ DEFAULT_TOKEN_PATH = os.path.join(Path.home(), ".fantasy-bot", "tokens.json")
 YAHOO_AUTH_BASE = "https://api.login.yahoo.com"
 YAHOO_API_BASE = "https://fantasysports.yahooapis.com/fantasy/v2"
 
+# Compact add-transaction body for Yahoo, compiled once at import
+_ADD_TRANSACTION_XML = Template(
+    "<fantasy_content><transaction><type>add</type><faab_bid>$faab</faab_bid>"
+    "<player><player_key>$pk</player_key></player><team_key>$tk</team_key>"
+    "</transaction></fantasy_content>"
+)
+
+
+def add_transaction_xml(player_key: Any, team_key: str, faab_bid: Any = 0) -> str:
+    """XML body for a waiver/free-agent add; keys are escaped, the bid truncated to whole FAAB."""
+    return _ADD_TRANSACTION_XML.substitute(
+        faab=int(faab_bid or 0), pk=_xml_escape(str(player_key)), tk=_xml_escape(str(team_key))
+    )
+
 
 @dataclass
 class OAuthTokens:
@@ -48,6 +65,8 @@ class YahooClient:
         self.token_path = token_path or os.environ.get("YAHOO_TOKEN_PATH", DEFAULT_TOKEN_PATH)
         self._client = httpx.Client(transport=transport, timeout=30)
         self._tokens: Optional[OAuthTokens] = None
+        # Concurrent requests (e.g. parallel ingest fetches) must not race a token refresh
+        self._token_lock = threading.Lock()
 
         # Ensure token directory exists
         token_dir = os.path.dirname(self.token_path)
@@ -164,25 +183,30 @@ class YahooClient:
 
     # --- Request helpers ---
     def _ensure_valid_access_token(self) -> str:
-        # Try to load from disk if memory empty
-        if self._tokens is None:
-            self._tokens = self._load_tokens()
-        # Refresh if missing or expired
-        if self._tokens is None:
-            raise RuntimeError("No OAuth tokens found. Authorize first.")
-        if self._tokens.is_expired:
-            self.refresh_access_token()
-        assert self._tokens is not None
-        return self._tokens.access_token
+        with self._token_lock:
+            # Try to load from disk if memory empty
+            if self._tokens is None:
+                self._tokens = self._load_tokens()
+            # Refresh if missing or expired
+            if self._tokens is None:
+                raise RuntimeError("No OAuth tokens found. Authorize first.")
+            if self._tokens.is_expired:
+                self.refresh_access_token()
+            assert self._tokens is not None
+            return self._tokens.access_token
 
     def _auth_headers(self) -> Dict[str, str]:
         token = self._ensure_valid_access_token()
         return {"Authorization": f"Bearer {token}"}
 
-    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+    def get(
+        self, path: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
         url = self._build_url(path)
-        headers = self._auth_headers()
-        return self._client.get(url, params=params, headers=headers)
+        request_headers = self._auth_headers()
+        if headers:
+            request_headers.update(headers)
+        return self._client.get(url, params=params, headers=request_headers)
 
     def post_xml(self, path: str, xml_body: str) -> httpx.Response:
         url = self._build_url(path)
@@ -195,4 +219,4 @@ class YahooClient:
         return f"{self.api_base_url}/{path_clean}"
 
 
-__all__ = ["YahooClient", "OAuthTokens", "DEFAULT_TOKEN_PATH"]
+__all__ = ["YahooClient", "OAuthTokens", "DEFAULT_TOKEN_PATH", "add_transaction_xml"]
@@ -1,16 +1,16 @@
+import json
 import os
 import sqlite3
 import tempfile
 from contextlib import contextmanager
 
-from app.store import migrate
-from app.inbox import notify
+from app.store import decode_log_payload, migrate
+from app.inbox import get_inbox_detail, get_notification, notify
 from app.ai.agent import run_agent
 
 
 @contextmanager
 def temp_db():
-    import os, tempfile
     fd, path = tempfile.mkstemp(suffix=".db")
     os.close(fd)
     try:
@@ -33,3 +33,80 @@ def test_run_agent_posts_message(monkeypatch):
         assert isinstance(msg_id, int) and msg_id > 0
 
 
+def test_run_agent_flushes_telemetry_in_one_run():
+    with temp_db() as path:
+        notify("info", "Detected League Settings", "Loaded.", {"scoring": {"ppr": 1.0}})
+        msg_id = run_agent("weekly_brief", {"offline": True})
+        con = sqlite3.connect(path)
+        cur = con.cursor()
+        cur.execute("SELECT id, status, finished_at FROM agent_runs")
+        run_id, status, finished_at = cur.fetchone()
+        assert status == "ok" and finished_at is not None
+        cur.execute("SELECT name FROM tool_calls WHERE run_id = ?", (run_id,))
+        assert [r[0] for r in cur.fetchall()] == ["get_league_state"]
+        cur.execute("SELECT kind, payload FROM decisions WHERE run_id = ?", (run_id,))
+        kind, payload = cur.fetchone()
+        con.close()
+        assert kind == "summary" and decode_log_payload(payload)["message_id"] == msg_id
+
+
+def test_agent_brief_payload_references_run():
+    with temp_db():
+        notify("info", "Detected League Settings", "Loaded.", {"scoring": {"ppr": 1.0}})
+        msg_id = run_agent("weekly_brief", {"offline": True})
+        stored = json.loads(get_notification(msg_id)["payload"])
+        assert "state" not in stored and stored["waivers_count"] == 0
+        detail = get_inbox_detail(msg_id)
+        assert detail["state"]["counts"]["teams"] == 0
+        assert detail["waivers"] == {"recommendations": []}
+
+
+def test_agent_brief_detail_is_complete_once_posted(monkeypatch):
+    from app.ai import agent
+
+    seen = {}
+
+    def post_and_read(*args):
+        msg_id = notify(*args)
+        seen["detail"] = get_inbox_detail(msg_id)
+        return msg_id
+
+    monkeypatch.setattr(agent, "notify", post_and_read)
+    with temp_db():
+        notify("info", "Detected League Settings", "Loaded.", {"scoring": {"ppr": 1.0}})
+        run_agent("weekly_brief", {"offline": True})
+    # Read while the run was still open: its tool calls must already be there
+    assert seen["detail"]["state"]["counts"]["teams"] == 0
+
+
+def test_yahoo_client_rebuilt_when_credentials_change(tmp_path, monkeypatch):
+    from app.ai import agent
+    from app.config import Settings
+
+    monkeypatch.setenv("YAHOO_TOKEN_PATH", str(tmp_path / "tokens.json"))
+    monkeypatch.setattr(agent, "_YAHOO_CLIENT", None)
+    current = Settings(yahoo_client_id="old", yahoo_client_secret="s", yahoo_redirect_uri="http://x/cb")
+    monkeypatch.setattr("app.config.get_settings", lambda: current)
+    monkeypatch.setattr("app.yahoo_client.get_settings", lambda: current)
+    first = agent._yahoo_client()
+    assert agent._yahoo_client() is first
+    current = Settings(yahoo_client_id="new", yahoo_client_secret="s", yahoo_redirect_uri="http://x/cb")
+    rebuilt = agent._yahoo_client()
+    assert rebuilt is not first and rebuilt.settings.yahoo_client_id == "new"
+
+
+def test_async_inbox_run_records_message_id_once_posted():
+    from app.inbox import flush_deferred
+
+    with temp_db() as path:
+        notify("info", "Detected League Settings", "Loaded.", {"scoring": {"ppr": 1.0}})
+        assert run_agent("weekly_brief", {"offline": True, "async_inbox": True}) is None
+        flush_deferred()
+        con = sqlite3.connect(path)
+        cur = con.cursor()
+        cur.execute("SELECT id FROM notifications WHERE kind = 'brief'")
+        (msg_id,) = cur.fetchone()
+        cur.execute("SELECT kind, payload FROM decisions")
+        kind, payload = cur.fetchone()
+        con.close()
+        assert kind == "summary" and decode_log_payload(payload)["message_id"] == msg_id
@@ -0,0 +1,41 @@
+import json
+
+from app.ai import policy
+
+
+def test_thresholds_reload_from_env(monkeypatch):
+    monkeypatch.setenv(
+        "AI_THRESHOLDS_JSON",
+        json.dumps({"waiver": {"score_min": 5, "confidence_min": 0.5, "faab_cap_pct": 0.5}}),
+    )
+    try:
+        policy.reload_thresholds()
+        assert policy.can_execute_waiver(6.0, confidence=None, faab_bid=40, faab_total=100)
+        assert not policy.can_execute_waiver(4.0, confidence=None, faab_bid=1, faab_total=100)
+        assert not policy.can_execute_waiver(6.0, confidence=0.4, faab_bid=1, faab_total=100)
+        assert not policy.can_execute_waiver(6.0, confidence=None, faab_bid=60, faab_total=100)
+    finally:
+        monkeypatch.delenv("AI_THRESHOLDS_JSON")
+        policy.reload_thresholds()
+
+
+def test_invalid_thresholds_fall_back_to_defaults(monkeypatch):
+    monkeypatch.setenv("AI_THRESHOLDS_JSON", json.dumps({"waiver": {"score_min": "high"}}))
+    try:
+        policy.reload_thresholds()
+        assert not policy.can_execute_waiver(6.0, confidence=None, faab_bid=1, faab_total=100)
+        assert policy.can_execute_waiver(12.0, confidence=None, faab_bid=25, faab_total=100)
+    finally:
+        monkeypatch.delenv("AI_THRESHOLDS_JSON")
+        policy.reload_thresholds()
+
+
+def test_faab_total_may_be_a_string(monkeypatch):
+    monkeypatch.setenv("AI_THRESHOLDS_JSON", json.dumps({"waiver": {"score_min": 0, "faab_cap_pct": 0.5}}))
+    try:
+        policy.reload_thresholds()
+        assert policy.can_execute_waiver(6.0, confidence=None, faab_bid=40, faab_total="100")
+        assert not policy.can_execute_waiver(6.0, confidence=None, faab_bid=60, faab_total="100")
+    finally:
+        monkeypatch.delenv("AI_THRESHOLDS_JSON")
+        policy.reload_thresholds()
@@ -44,3 +44,65 @@ def test_build_and_post_gm_brief():
         assert cnt == 1
 
 
+def test_league_context_projects_transaction_fields():
+    from app.brief import _get_league_context
+
+    s = LeagueSettings.from_yahoo({"settings": {}})
+    with temp_db() as path:
+        con = sqlite3.connect(path)
+        con.executemany(
+            "INSERT INTO transactions_raw(kind, team_id, raw) VALUES(?, ?, ?)",
+            [
+                ("add", "1", '{"type": "add", "timestamp": "123", "players": {"0": {}}}'),
+                ("bad", None, "not json"),
+                ("drop", "2", '{"player_id": "p9", "status": "successful"}'),
+            ],
+        )
+        con.commit()
+        con.close()
+        context = _get_league_context(s)
+    assert context["transactions"] == [
+        {"kind": "drop", "team_id": "2", "data": {"status": "successful", "player_id": "p9"}},
+        {"kind": "add", "team_id": "1", "data": {"type": "add", "timestamp": "123", "players": {"0": {}}}},
+    ]
+
+
+def test_league_context_keeps_yahoo_transaction_players():
+    from app.brief import _get_league_context
+    from app.ingest import persist_bundle
+
+    # Shape of fantasy_content.league.transactions: the players sit under a nested key
+    players = {
+        "0": {"player": [[{"player_key": "nfl.p.1"}, {"name": {"full": "Added Guy"}}], {"transaction_data": [{"type": "add", "destination_team_key": "nfl.l.1.t.1"}]}]},
+        "1": {"player": [[{"player_key": "nfl.p.2"}, {"name": {"full": "Dropped Guy"}}], {"transaction_data": {"type": "drop", "source_team_key": "nfl.l.1.t.1"}}]},
+        "count": 2,
+    }
+    txs = {
+        "0": {"transaction": [{"transaction_key": "nfl.l.1.tr.7", "type": "add/drop", "status": "successful", "timestamp": "1700000000"}, {"players": players}]},
+        "count": 1,
+    }
+    s = LeagueSettings.from_yahoo({"settings": {}})
+    with temp_db():
+        persist_bundle({"transactions": {"fantasy_content": {"league": [{}, {"transactions": txs}]}}})
+        context = _get_league_context(s)
+    [tx] = context["transactions"]
+    assert tx["data"]["type"] == "add/drop" and tx["data"]["status"] == "successful"
+    assert tx["data"]["players"] == players
+
+
+def test_league_context_roster_is_latest_week_only(monkeypatch):
+    import app.brief as brief
+    from app.config import Settings
+
+    monkeypatch.setattr(brief, "get_settings", lambda: Settings(team_key="nfl.l.1.t.1"))
+    s = LeagueSettings.from_yahoo({"settings": {}})
+    with temp_db() as path:
+        con = sqlite3.connect(path)
+        con.executemany(
+            "INSERT INTO rosters(team_id, player_id, week, slot) VALUES(?, ?, ?, ?)",
+            [("1", "old", 2, "BN"), ("1", "a", 3, "QB"), ("1", "b", 3, "WR"), ("2", "c", 4, "RB")],
+        )
+        con.commit()
+        con.close()
+        context = brief._get_league_context(s)
+    assert [p["id"] for p in context["my_roster"]] == ["a", "b"]
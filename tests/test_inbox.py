@@ -67,3 +67,169 @@ def test_list_and_detail_and_mark_read():
         assert is_read == 1
 
 
+def test_notify_deferred_resolves_ids_on_flush():
+    from app.inbox import flush_deferred, get_notification, notify, notify_deferred
+
+    with temp_db():
+        first = notify("info", "sync", "a")
+        deferred = [notify_deferred("info", f"deferred {i}", "b") for i in range(3)]
+        # A synchronous write flushes pending rows first, so ids follow call order
+        after = notify("info", "sync again", "c")
+        ids = [f.result(timeout=1) for f in deferred]
+        assert ids == [first + 1, first + 2, first + 3] and after == first + 4
+        assert get_notification(ids[1])["title"] == "deferred 1"
+        assert flush_deferred() == 0
+
+
+def test_notify_deferred_survives_other_writers_and_failed_flush(monkeypatch):
+    from app import inbox
+    from app.inbox import flush_deferred, get_notification, notify_deferred
+
+    with temp_db() as db_path:
+        pending = notify_deferred("info", "deferred", "b")
+        # Another connection takes the next id before the flush runs
+        other = insert_notification(db_path, "info", "other writer", "x")
+
+        def broken_writer(path=None):
+            raise sqlite3.OperationalError("database is locked")
+
+        with monkeypatch.context() as m:
+            m.setattr(inbox, "get_writer", broken_writer)
+            with pytest.raises(sqlite3.OperationalError):
+                flush_deferred()
+        assert not pending.done()
+
+        # The row was requeued and lands on the next flush with its own id
+        assert flush_deferred() == 1
+        msg_id = pending.result(timeout=1)
+        assert msg_id != other
+        assert get_notification(msg_id)["title"] == "deferred"
+        assert get_notification(other)["title"] == "other writer"
+
+
+def test_pooled_connections_follow_replaced_db_file():
+    from app.db import get_pool
+    from app.inbox import notify, unread_count
+
+    with temp_db() as path:
+        pool = get_pool()
+        notify("info", "one", "a")
+        assert unread_count() == 1
+        os.remove(path)
+        dbmod.migrate()
+        # The file was recreated, so the pool must not keep serving the old inode
+        assert get_pool() is not pool
+        assert unread_count() == 0
+
+
+def test_unread_count_is_cached_until_the_db_changes():
+    from app.inbox import mark_all_read, notify, unread_count
+
+    with temp_db() as path:
+        notify("info", "one", "a")
+        assert unread_count() == 1
+        assert unread_count() == 1
+        # A commit from an unrelated connection must invalidate the cached count too
+        insert_notification(path, "info", "two", "b")
+        assert unread_count() == 2
+        mark_all_read()
+        assert unread_count() == 0
+
+
+def test_home_payload_matches_individual_queries():
+    from app.inbox import get_home_payload, latest_settings_payload, list_notifications, notify, unread_count
+
+    with temp_db():
+        notify("info", "Detected League Settings", "Loaded", {"num_teams": 12})
+        notify("waivers", "Waiver targets", "body")
+        for kind in (None, "waivers"):
+            home = get_home_payload(kind)
+            assert home["rows"] == list_notifications(kind, include_body=True)
+            assert home["unread"] == unread_count() == 2
+            assert home["settings"] == latest_settings_payload() == {"num_teams": 12}
+
+
+def test_latest_settings_payload_follows_new_settings():
+    from app.inbox import latest_settings_payload, notify
+
+    with temp_db() as path:
+        assert latest_settings_payload() is None
+        notify("info", "Detected League Settings", "Loaded", {"num_teams": 10})
+        first = latest_settings_payload()
+        assert first == {"num_teams": 10}
+        # Callers get their own dict even when the row is served from the cache
+        first["num_teams"] = 0
+        assert latest_settings_payload() == {"num_teams": 10}
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute(
+                "INSERT INTO notifications(kind, title, body, payload, created_at) VALUES(?, ?, ?, ?, ?)",
+                ("info", "Detected League Settings", "Loaded", '{"num_teams": 12}', "2999-01-01 00:00:00"),
+            )
+        connection.close()
+        assert latest_settings_payload() == {"num_teams": 12}
+
+
+def test_home_page_etag_revalidates_until_inbox_changes():
+    with temp_db() as db_path:
+        client = TestClient(app)
+        n1 = insert_notification(db_path, "info", "Hello", "World")
+
+        r = client.get("/")
+        etag = r.headers["etag"]
+        assert r.headers["cache-control"] == "no-cache"
+
+        r = client.get("/", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.content == b""
+
+        client.post(f"/notifications/{n1}/read", follow_redirects=False)
+        r = client.get("/", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["etag"] != etag
+
+
+def test_home_page_prefetches_only_for_full_pages(monkeypatch):
+    import app.main as main
+
+    calls = []
+    monkeypatch.setattr(main, "prefetch_gm_context", calls.append)
+    with temp_db():
+        main.notify("info", "Detected League Settings", "Loaded", {"scoring": {"ppr": 1.0}})
+        client = TestClient(app)
+        r = client.get("/")
+        assert r.status_code == 200 and len(calls) == 1
+        r = client.get("/", headers={"If-None-Match": r.headers["etag"]})
+        assert r.status_code == 304 and len(calls) == 1
+
+
+def test_cached_reads_do_not_wait_for_an_open_write():
+    import threading
+
+    from app.db import get_writer
+    from app.inbox import notify, unread_count
+
+    with temp_db():
+        notify("info", "one", "a")
+        assert unread_count() == 1
+        writing, release = threading.Event(), threading.Event()
+
+        def long_write():
+            with get_writer() as connection:
+                connection.execute("INSERT INTO notifications(title, body) VALUES('two', 'b')")
+                writing.set()
+                release.wait(5)
+
+        writer = threading.Thread(target=long_write)
+        writer.start()
+        try:
+            writing.wait(5)
+            result = []
+            reader = threading.Thread(target=lambda: result.append(unread_count()))
+            reader.start()
+            reader.join(2)
+            assert result == [1]
+        finally:
+            release.set()
+            writer.join()
+        assert unread_count() == 2
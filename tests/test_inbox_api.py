@@ -39,3 +39,11 @@ def test_inbox_api_crud():
         assert unread_count() == 0
 
 
+def test_list_notifications_projects_and_pages():
+    with temp_db():
+        ids = [notify("info", f"n{i}", "body", {"big": "x" * 100}) for i in range(3)]
+        items = list_notifications()
+        assert "payload" not in items[0] and "body" not in items[0]
+        assert list_notifications(include_body=True)[0]["body"] == "body"
+        page = list_notifications(limit=2, offset=1)
+        assert len(page) == 2 and {r["id"] for r in page} <= set(ids)
@@ -1,9 +1,12 @@
 import json
+import sqlite3
 from pathlib import Path
 
 import httpx
 
-from app.ingest import fetch_league_bundle, ingest
+from app.ingest import fetch_league_bundle, ingest, persist_bundle
+from app.models import LeagueSettings
+from app.store import migrate
 from app.yahoo_client import YahooClient
 
 
@@ -70,3 +73,123 @@ def test_ingest_fetches_and_caches(tmp_path: Path, monkeypatch):
     assert settings.trade_deadline_week == 10
 
 
+def test_persist_bundle_writes_rows_in_order(tmp_path: Path, monkeypatch):
+    db_path = tmp_path / "ingest.db"
+    monkeypatch.setenv("DB_PATH", str(db_path))
+    migrate()
+    bundle = {
+        "teams": [{"team_id": "1", "name": "A"}, {"team_id": "2", "name": "B"}],
+        "players": [{"player_id": "p1", "name": "P1", "position": "WR", "bye_week": 7}],
+        "rosters": [
+            {
+                "team_id": "1",
+                "week": 3,
+                "entries": [
+                    {"player_id": "p1", "slot": "WR", "status": "ok"},
+                    # A later row for the same player wins, but a missing slot keeps the earlier one
+                    {"player_id": "p1", "slot": None, "status": "Q"},
+                ],
+            }
+        ],
+        "matchups": [{"week": 3, "team_a": {"team_id": "1"}, "team_b": {"team_id": "2"}}],
+        "transactions": [{"type": "add", "team_id": "1"}],
+    }
+    persist_bundle(bundle)
+
+    con = sqlite3.connect(db_path)
+    try:
+        assert con.execute("SELECT COUNT(1) FROM teams").fetchone()[0] == 2
+        assert con.execute("SELECT bye_week FROM players WHERE id = 'p1'").fetchone()[0] == 7
+        assert con.execute("SELECT status, slot FROM rosters").fetchall() == [("Q", "WR")]
+        assert con.execute("SELECT COUNT(1) FROM matchups WHERE week = 3").fetchone()[0] == 2
+        kind, raw = con.execute("SELECT kind, raw FROM transactions_raw").fetchone()
+        assert kind == "add" and json.loads(raw)["team_id"] == "1"
+    finally:
+        con.close()
+
+
+def test_cache_read_revalidates_on_mtime(tmp_path: Path):
+    import os
+
+    from app.ingest import _cache_read, _cache_write
+
+    _cache_write(tmp_path, "k", {"v": 1})
+    assert _cache_read(tmp_path, "k") == {"v": 1}
+    path = tmp_path / "k.json"
+    path.write_text(json.dumps({"v": 2}))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert _cache_read(tmp_path, "k") == {"v": 2}
+    assert _cache_read(tmp_path, "missing") is None
+
+
+def test_cache_write_removes_temp_file_on_failure(tmp_path: Path, monkeypatch):
+    import os
+
+    import pytest
+
+    from app.ingest import _cache_write
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        _cache_write(tmp_path, "k", {"v": 1})
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_league_settings_sidecar_follows_league_file(tmp_path: Path):
+    import os
+
+    from app.ingest import _cache_key_for, _cache_write, _league_settings
+
+    raw = json.loads((Path(__file__).parent / "fixtures" / "league.json").read_text())
+    key = _cache_key_for("league/nfl.l.123", {"format": "json"})
+    _cache_write(tmp_path, key, raw)
+
+    first = _league_settings(tmp_path, "nfl.l.123", raw)
+    assert (tmp_path / f"{key}.settings.json").exists()
+    # A current sidecar is used as-is, without reparsing the league payload
+    assert _league_settings(tmp_path, "nfl.l.123", {}) == first
+
+    # Refetching the league file invalidates the sidecar
+    league_file = tmp_path / f"{key}.json"
+    st = league_file.stat()
+    os.utime(league_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert _league_settings(tmp_path, "nfl.l.123", {}) == LeagueSettings.from_yahoo({})
+
+
+def test_league_settings_reparses_sidecar_from_older_model(tmp_path: Path):
+    from app.ingest import _cache_key_for, _cache_write, _league_settings
+
+    raw = json.loads((Path(__file__).parent / "fixtures" / "league.json").read_text())
+    key = _cache_key_for("league/nfl.l.123", {"format": "json"})
+    _cache_write(tmp_path, key, raw)
+    mtime_ns = (tmp_path / f"{key}.json").stat().st_mtime_ns
+    _cache_write(tmp_path, f"{key}.settings", {"source_mtime_ns": mtime_ns, "settings": {"roster_slots": 3}})
+    assert _league_settings(tmp_path, "nfl.l.123", raw) == LeagueSettings.from_yahoo(raw)
+
+
+def test_revalidate_uses_etag_and_keeps_body_on_304(tmp_path: Path, monkeypatch):
+    from app.ingest import _get_or_fetch_json
+
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"v": 1}, headers={"ETag": '"v1"'})
+
+    token_path = tmp_path / "tokens.json"
+    token_path.write_text(json.dumps({"access_token": "t", "refresh_token": "r", "expires_at": 9999999999}))
+    monkeypatch.setenv("YAHOO_TOKEN_PATH", str(token_path))
+    client = YahooClient(transport=httpx.MockTransport(handler))
+    cache_dir = tmp_path / ".cache"
+
+    assert _get_or_fetch_json(client, "league/x", params=None, cache_dir=cache_dir) == {"v": 1}
+    # Plain cache hit: no request
+    assert _get_or_fetch_json(client, "league/x", params=None, cache_dir=cache_dir) == {"v": 1}
+    assert _get_or_fetch_json(client, "league/x", params=None, cache_dir=cache_dir, revalidate=True) == {"v": 1}
+    assert seen == [None, '"v1"']
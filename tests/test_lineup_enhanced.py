@@ -230,3 +230,68 @@ def test_recommendation_rationale_formatting():
     assert "projected 16.0 pts" in full
     assert "injury risk" in full
 
+
+def test_projection_index_is_reused_but_empty_results_are_not(monkeypatch):
+    """Repeat lookups within the TTL reuse the index; an empty fetch is retried."""
+    from app import lineup_enhanced
+    from app.projections import PlayerProjection
+
+    calls = []
+    results = {1: [], 2: [PlayerProjection(player_name="Joe Burrow", position="QB", team="CIN", week=2)]}
+
+    def fake_get_projections(week):
+        calls.append(week)
+        return results[week]
+
+    monkeypatch.setattr(lineup_enhanced, "get_projections", fake_get_projections)
+    lineup_enhanced._CONTEXT_CACHE.clear()
+    try:
+        assert lineup_enhanced._projection_index(1) == {}
+        assert lineup_enhanced._projection_index(1) == {}
+        assert "joe burrow" in lineup_enhanced._projection_index(2)
+        assert "joe burrow" in lineup_enhanced._projection_index(2)
+        assert calls == [1, 1, 2]
+    finally:
+        lineup_enhanced._CONTEXT_CACHE.clear()
+
+
+def test_sit_start_pairs_each_bench_player_with_one_starter():
+    """Each bench player replaces the weakest starter it beats; no starter is benched twice."""
+    settings = LeagueSettings(
+        roster_slots={"QB": 1, "RB": 2, "WR": 2, "TE": 1, "FLEX": 1, "BENCH": 6},
+        positional_limits=PositionalLimits(qb=1, rb=2, wr=2, te=1, flex=1, bench=6),
+        scoring=ScoringRules(ppr=1.0, pass_td=4, rush_td=6, rec_td=6),
+        bench_size=6,
+    )
+
+    def wr(pid, projection, is_starter):
+        return EnhancedPlayer(
+            id=pid, name=pid, position="WR", team="KC",
+            base_projection=projection, adjusted_projection=projection,
+            is_starter=is_starter, current_slot="WR" if is_starter else "BN",
+        )
+
+    players = [
+        wr("s1", 10.0, True),
+        wr("s2", 6.0, True),
+        wr("b1", 20.0, False),
+        wr("b2", 12.0, False),
+    ]
+
+    from app.lineup_enhanced import generate_sit_start_recommendations
+
+    recs = generate_sit_start_recommendations(settings=settings, players=players, week=5, min_confidence=0.0)
+
+    assert [(r.player_in.id, r.player_out.id) for r in recs] == [("b1", "s1"), ("b2", "s2")]
+
+    # Pairing the best bench player with the weakest starter would leave b2 (8) with no
+    # starter to beat; both bench players belong in the lineup
+    players = [
+        wr("s1", 10.0, True),
+        wr("s2", 6.0, True),
+        wr("b1", 20.0, False),
+        wr("b2", 8.0, False),
+    ]
+    recs = generate_sit_start_recommendations(settings=settings, players=players, week=5, min_confidence=0.0)
+
+    assert [(r.player_in.id, r.player_out.id) for r in recs] == [("b1", "s1"), ("b2", "s2")]
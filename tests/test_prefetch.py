@@ -0,0 +1,45 @@
+import time
+
+from app import prefetch
+
+
+def test_wait_or_compute_uses_finished_prefetch_once():
+    key = ("test", "finished")
+    prefetch._submit(key, lambda: "prefetched")
+    deadline = time.time() + 2
+    while not prefetch._PENDING.get(key).done() and time.time() < deadline:
+        time.sleep(0.01)
+    assert prefetch.wait_or_compute(key, lambda: "inline") == "prefetched"
+    # Consumed: the next call computes fresh data
+    assert prefetch.wait_or_compute(key, lambda: "inline") == "inline"
+
+
+def test_wait_or_compute_falls_back_on_failed_prefetch():
+    key = ("test", "failed")
+
+    def boom():
+        raise RuntimeError("offline")
+
+    prefetch._submit(key, boom)
+    prefetch._PENDING.get(key).exception(timeout=2)
+    assert prefetch.wait_or_compute(key, lambda: "inline") == "inline"
+
+
+def test_context_key_changes_when_the_database_changes(tmp_path, monkeypatch):
+    import sqlite3
+
+    from app.db import migrate
+    from app.models import LeagueSettings
+
+    path = str(tmp_path / "prefetch.db")
+    monkeypatch.setenv("DB_PATH", path)
+    migrate()
+    settings = LeagueSettings.from_yahoo({"settings": {}})
+    before = prefetch.context_key(settings)
+    assert prefetch.context_key(settings) == before
+    # An Ingest/Sync between opening the Inbox and generating the brief writes on its own connection
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("INSERT INTO notifications(title, body) VALUES('synced', '')")
+    connection.close()
+    assert prefetch.context_key(settings) != before
@@ -5,7 +5,7 @@ import tempfile
 from contextlib import contextmanager
 
 from app import db as dbmod
-from app.store import migrate, upsert_player, upsert_team, upsert_roster, upsert_matchup, record_snapshot, main
+from app.store import migrate, upsert_player, upsert_team, upsert_roster, upsert_matchup, record_snapshot, record_snapshots_many, main
 
 
 @contextmanager
@@ -44,8 +44,53 @@ def test_migrate_and_upserts_and_snapshot():
         conn.close()
 
 
+def test_record_snapshots_many_matches_single_inserts():
+    with temp_db() as path:
+        single, _ = record_snapshot(endpoint="league/1", params={"format": "json"}, raw="{}")
+        results = record_snapshots_many([
+            ("league/1", {"format": "json"}, "{}"),
+            ("league/1/teams", {"format": "json"}, '{"teams": []}'),
+            ("league/1/teams", {"format": "json"}, '{"teams": []}'),
+        ])
+        assert results[0] == (single, False)
+        assert results[1][1] is True
+        assert results[2] == (results[1][0], False)
+
+        conn = sqlite3.connect(path)
+        count = conn.execute("SELECT COUNT(1) FROM snapshots").fetchone()[0]
+        conn.close()
+        assert count == 2
+
+
+def test_player_position_rank_is_set_on_upsert_and_backfilled():
+    with temp_db() as path:
+        upsert_player(player_id="p1", name="A", position="TE")
+        upsert_player(player_id="p2", name="B", position="DL")
+        conn = sqlite3.connect(path)
+        ranks = dict(conn.execute("SELECT id, position_rank FROM players"))
+        assert ranks == {"p1": 4, "p2": 7}
+
+        # A database from before the column existed is upgraded in place
+        conn.execute("DROP TABLE players")
+        conn.execute("CREATE TABLE players (id TEXT PRIMARY KEY, name TEXT, position TEXT, team TEXT, bye_week INTEGER, updated_at TEXT)")
+        conn.execute("INSERT INTO players(id, name, position) VALUES('p3', 'C', 'QB')")
+        conn.commit()
+        migrate()
+        assert conn.execute("SELECT position_rank FROM players WHERE id='p3'").fetchone()[0] == 1
+        upsert_player(player_id="p3", name="C", position="K")
+        assert conn.execute("SELECT position_rank FROM players WHERE id='p3'").fetchone()[0] == 5
+        conn.close()
+
+
 def test_cli_migrate():
     with temp_db():
         assert main(["migrate"]) == 0
 
 
+def test_build_context_sees_players_table_created_after_first_check(tmp_path, monkeypatch):
+    from app.ai.context import build_context
+
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "late.db"))
+    assert build_context()["has_players"] is False
+    migrate()
+    assert build_context()["has_players"] is True
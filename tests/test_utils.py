@@ -0,0 +1,34 @@
+from app import utils
+from app.utils import TTLCache, normalize_league_key, ttl_cache
+
+
+def test_normalize_league_key():
+    assert normalize_league_key("123") == "nfl.l.123"
+    assert normalize_league_key("l.9") == "nfl.l.9"
+    assert normalize_league_key("nfl.l.5") == "nfl.l.5"
+
+
+def test_ttl_cache_expires_and_refreshes_inline(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(utils.time, "monotonic", lambda: now[0])
+    calls = []
+
+    @ttl_cache(ttl=10)
+    def fetch(x):
+        calls.append(x)
+        return x * 2
+
+    assert fetch(2) == 4 and fetch(2) == 4
+    assert calls == [2]
+    now[0] += 10
+    assert fetch(2) == 4
+    assert calls == [2, 2]
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and len(cache) == 2
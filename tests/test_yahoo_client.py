@@ -6,7 +6,7 @@ from pathlib import Path
 import httpx
 import pytest
 
-from app.yahoo_client import YahooClient, OAuthTokens
+from app.yahoo_client import YahooClient, OAuthTokens, add_transaction_xml
 
 
 class DummyTransport(httpx.BaseTransport):
@@ -65,3 +65,9 @@ def test_exchange_code_for_tokens(tmp_path: Path, monkeypatch):
     assert token_path.exists()
 
 
+def test_add_transaction_xml_escapes_keys_and_truncates_bid():
+    xml = add_transaction_xml("nfl.p.<1>&", "nfl.l.1.t.2", 7.9)
+    assert "<faab_bid>7</faab_bid>" in xml
+    assert "<player_key>nfl.p.&lt;1&gt;&amp;</player_key>" in xml
+    assert "<team_key>nfl.l.1.t.2</team_key>" in xml
+    assert "<faab_bid>0</faab_bid>" in add_transaction_xml("p", "t", None)